@@ -3,21 +3,23 @@ from pathlib import Path
 
 import streamlit as st
 import pandas as pd
-import torch
 import matplotlib.pyplot as plt
-from sklearn.metrics import classification_report
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import secrets
 
 # ─── project paths ────────────────────────────────────────────────────────────
 ROOT       = Path(__file__).resolve().parent
 sys.path.append(str(ROOT / "src"))
-from inject_anomalies import AE, COLS, SEQ
+from packet import open_packet, PacketError
+from keystore import KeyStore
+from key_vault import KeyVault
+import eval_cache
+from alert_store import AlertStore, ALERTS_DB, PAGE
 
 MODEL_PATH = ROOT / "model" / "lstm_ae.pt"
 DATA_PATH  = ROOT / "data" / "annotated.csv"
 KEYS_DIR   = ROOT / "keys"
-LOG_PATH   = ROOT / "listener_output.log"
+VAULT_PATH = KEYS_DIR / "vault.qkv"
+LIVE_REFRESH_S = 2                        # Live Monitoring poll interval
 
 # ─── page config ──────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -26,17 +28,6 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-# ─── load+cache model ─────────────────────────────────────────────────────────
-@st.cache_resource(show_spinner=False)
-def load_model():
-    ckpt = torch.load(MODEL_PATH, map_location="cpu")
-    net  = AE(len(COLS))
-    net.load_state_dict(ckpt)
-    net.eval()
-    return net
-
-net = load_model()
-
 # ─── global CSS ───────────────────────────────────────────────────────────────
 st.markdown("""
 <style>
@@ -74,72 +65,111 @@ tabs = st.tabs([
 ])
 
 # ─── Evaluate Model ───────────────────────────────────────────────────────────
-with tabs[0]:
-    st.header("Model Evaluation")
-    with st.spinner("Reconstructing & computing metrics…"):
-        df = pd.read_csv(DATA_PATH).ffill()
-        df["V_real"] = df["voltage_C"].str.extract(r"([-+]?\d*\.?\d+)").astype(float)
-        df["V_imag"] = df["voltage_C"].str.extract(r"\+(\d*\.?\d+)j").astype(float)
-        df["label"]  = df["label"].astype(str).map({"True": True, "False": False})
-
-        x    = torch.tensor(df[COLS].values, dtype=torch.float32)
-        seqs = torch.stack([x[i:i+SEQ] for i in range(len(x)-SEQ)])
-        with torch.no_grad():
-            recon  = net(seqs)
-        errors   = ((recon - seqs)**2).mean(dim=(1,2)).cpu().numpy()
-        thr      = errors.mean() + 3*errors.std()
-        mean_err = errors.mean()
-        std_err  = errors.std()
-        pred     = (errors > thr).astype(int)
-        true     = df["label"].iloc[SEQ:].astype(int).values
+def show_evaluation(result, state):
+    if state == "running":
+        st.info("Model or dataset changed — re-evaluating in the background"
+                + ("; showing the previous result." if result else "…"))
+    elif state != "ready":
+        st.error(f"Evaluation {state}")
+    if result is None:
+        return
+    thr, stats = result["threshold"], result["stats"]
 
     # metrics row
     col1, col2, col3 = st.columns(3)
     col1.metric("Threshold", f"{thr:.2e}")
-    col2.metric("Mean Error", f"{mean_err:.2e}")
-    col3.metric("Std Dev",    f"{std_err:.2e}")
+    col2.metric("Mean Error", f"{result['mean']:.2e}")
+    col3.metric("Std Dev",    f"{result['std']:.2e}")
+    st.caption(f"Scored {stats['windows']:,} windows in {stats['seconds']:.2f} s "
+               f"({stats['windows_per_s']:,.0f} windows/s) · cache entry `{result['entry']}`")
 
     # classification table
-    report = classification_report(true, pred, digits=4, output_dict=True, zero_division=0)
-    rpt_df = pd.DataFrame(report).transpose()
+    rpt_df = pd.DataFrame(result["report"]).transpose()
     st.dataframe(rpt_df.style.background_gradient(axis=1), use_container_width=True)
 
-    # error histogram
+    # error histogram (binned when the entry was built)
+    counts, edges = result["hist"]["counts"], result["hist"]["edges"]
     fig, ax = plt.subplots(figsize=(10,3))
-    ax.hist(errors, bins=40, alpha=0.85)
+    ax.hist(edges[:-1], bins=edges, weights=counts, alpha=0.85)
     ax.axvline(thr, color="#f85149", linestyle="--", lw=2)
     ax.set(title="Error Distribution", xlabel="Reconstruction Error", ylabel="Count")
     st.pyplot(fig, use_container_width=True)
+    plt.close(fig)
+
+@st.fragment(run_every=2)
+def poll_evaluation(exact):
+    result, state = eval_cache.ensure(MODEL_PATH, DATA_PATH, exact)
+    if state != "running":
+        st.rerun()                      # finished: redraw once, without the timer
+    show_evaluation(result, state)
+
+with tabs[0]:
+    st.header("Model Evaluation")
+    exact = not st.checkbox("Fast approximate scoring", value=False,
+                            help="Use the incremental scorer instead of running the full autoencoder on every window")
+    result, state = eval_cache.ensure(MODEL_PATH, DATA_PATH, exact)
+    if state == "running":
+        poll_evaluation(exact)
+    else:
+        show_evaluation(result, state)
 
 # ─── Live Monitoring ──────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def load_alert_store():
+    return AlertStore(ALERTS_DB)           # one read connection for every session
+
+@st.fragment(run_every=LIVE_REFRESH_S)
+def live_alerts():
+    alerts = load_alert_store().latest(5)
+    if not alerts:
+        st.info("No decrypted alerts yet.")
+        return
+    st.caption(f"{load_alert_store().count():,} alerts stored · refreshed every {LIVE_REFRESH_S} s")
+    for a in alerts:
+        st.markdown(f"""
+        <div class="card">
+          <h4>🚨 {a['timestamp']}</h4>
+          <p><strong>Error:</strong> {a['error']:.2f}</p>
+          <p><small>Key:</small> {a['key_file']}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
 with tabs[1]:
     st.header("Real-time Alerts from Listener")
-    if not LOG_PATH.exists():
-        st.warning("No listener log found. Run `listener.py` first.")
+    if not ALERTS_DB.exists():
+        st.warning("No alert store found. Run `listener.py` first.")
     else:
-        lines, alerts, buf = LOG_PATH.read_text().splitlines(), [], {}
-        for ln in lines:
-            if ln.startswith("🚨 Decrypted alert:"):
-                buf = {}
-            if "Timestamp" in ln:
-                buf["timestamp"] = ln.split(":",2)[2].strip()
-            if "Error" in ln and "error" not in buf:
-                buf["error"] = float(ln.split(":",1)[1])
-            if "Key File" in ln:
-                buf["key"] = ln.split(":",1)[1].strip()
-                alerts.append(buf.copy())
-
-        if not alerts:
-            st.info("No decrypted alerts yet.")
-        else:
-            for a in alerts[-5:]:
-                st.markdown(f"""
-                <div class="card">
-                  <h4>🚨 {a['timestamp']}</h4>
-                  <p><strong>Error:</strong> {a['error']:.2f}</p>
-                  <p><small>Key:</small> {a['key']}</p>
-                </div>
-                """, unsafe_allow_html=True)
+        live_alerts()
+
+        with st.expander("Search stored alerts"):
+            c1, c2, c3 = st.columns(3)
+            since = c1.text_input("From (inclusive)", placeholder="2025-06-08 12:00:00") or None
+            until = c2.text_input("Until (exclusive)", placeholder="2025-06-08 13:00:00") or None
+            key   = c3.text_input("Key ID").strip()
+            if key and not key.isdigit():
+                st.error("Key ID must be an integer")
+            key   = int(key) if key.isdigit() else None
+            query = (since, until, key)
+            if st.session_state.get("alert_query") != query:     # new filter: back to page 1
+                st.session_state.alert_query, st.session_state.alert_pages = query, [None]
+            pages = st.session_state.alert_pages
+            store = load_alert_store()
+            rows  = store.query(since, until, key, before=pages[-1])
+            st.caption(f"{store.count(since, until, key):,} matching · page {len(pages)}")
+            st.dataframe(pd.DataFrame(rows), use_container_width=True)
+            b1, b2 = st.columns(2)
+            if b1.button("← Newer", disabled=len(pages) == 1):
+                pages.pop()
+                st.rerun()
+            if b2.button("Older →", disabled=len(rows) < PAGE):
+                pages.append(rows[-1]["id"])
+                st.rerun()
+
+@st.cache_resource(show_spinner=False)
+def load_keystore():
+    return KeyStore(KEYS_DIR, VAULT_PATH, cache_size=8192, cache_ttl=3600)
+
+store = load_keystore()
 
 # ─── Offline Alerts ──────────────────────────────────────────────────────────
 with tabs[2]:
@@ -159,16 +189,20 @@ with tabs[2]:
                     pkt = bytes.fromhex(hexstr)
                 except ValueError:
                     continue
-                nonce, ct = pkt[:12], pkt[12:]
-                for kf in sorted(KEYS_DIR.glob("*.bin"), reverse=True):
-                    try:
-                        pt = AESGCM(kf.read_bytes()).decrypt(nonce, ct, None)
-                        d  = json.loads(pt)
-                        d["key"] = kf.name
-                        parsed.append(d)
-                        break
-                    except:
-                        continue
+                try:
+                    pt, key_id = open_packet(pkt, store.get, store.legacy_keys())
+                except PacketError:
+                    continue
+                try:
+                    d = json.loads(pt)
+                except ValueError:             # authentic, but not an alert
+                    continue
+                if not isinstance(d, dict):
+                    continue
+                d["key"] = f"{key_id}.bin"
+                parsed.append(d)
+            cs = store.cache.stats()
+            st.caption(f"Key cache: {cs['hits']} hits · {cs['misses']} misses · {cs['size']} keys held")
             if parsed:
                 st.success(f"Decrypted {len(parsed)} alerts")
                 st.table(pd.DataFrame(parsed))
@@ -179,16 +213,15 @@ with tabs[2]:
 with tabs[3]:
     st.header("QKD Key Management")
     st.write(f"**Key directory:** `{KEYS_DIR}`")
-    keys = sorted(KEYS_DIR.glob("*.bin"))
     c1, c2 = st.columns([1,2])
     with c1:
         if st.button("Generate New Key"):
-            new  = secrets.token_bytes(32)
-            name = f"{int(time.time())}.bin"
-            (KEYS_DIR/name).write_bytes(new)
-            st.success(f"Created {name}")
+            with KeyVault(VAULT_PATH, create=True) as vault:
+                kid, = vault.add([secrets.token_bytes(32)])
+            st.success(f"Created key {kid}")
+    keys = store.ids()
     with c2:
         st.metric("Total Keys", len(keys))
     exp = st.expander("Show all keys")
     for k in keys:
-        exp.write(k.name)
+        exp.write(f"{k}.bin")
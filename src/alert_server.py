@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Asyncio alert server: many monitors → one listener over TCP, UDP or a Unix socket.
+
+    frame = LENGTH(u32, big-endian) | PACKET          # PACKET as built by packet.seal
+
+Addresses are ``tcp://host:port``, ``udp://host:port`` or ``unix:///path``.
+Stream clients send frames back to back.  A UDP datagram carries exactly one
+frame.  Every frame goes into one bounded queue that a single consumer
+drains through ``handle(source, packet)``.  ``handle`` runs in order on one
+handler thread, in batches of what is queued, so it may block (the
+listener's worker pool does when full) without stalling the event loop.  When the queue is full, each
+connection waits before reading its next frame.  The kernel buffers then
+fill and the sender's ``send`` blocks, so a slow listener slows its monitors
+down instead of growing without bound.  UDP cannot be paused, so datagrams
+that find the queue full are dropped and counted.  Datagrams that overflow
+the kernel's receive buffer are lost before the server sees them, so use a
+stream transport when every alert must arrive.
+
+On SIGINT/SIGTERM (or ``stop()``) the server stops accepting, closes the
+connections and handles every frame already queued before returning.
+Connections, frames/s, queue depth and drops are logged every ``STATS_EVERY``
+seconds.
+
+Benchmark:  python src/alert_server.py [--monitors N] [--frames N] [--addr ADDR]
+"""
+import socket
+import signal
+import struct
+import asyncio
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# ─── Configuration ──────────────────────────────────────────────────────────
+QUEUE_MAX   = 4096          # frames waiting for the consumer
+MAX_FRAME   = 64 << 10      # larger frames close the connection
+STATS_EVERY = 10.0          # seconds between stats lines
+BATCH       = 256           # frames handed to the handler thread at once
+# ─────────────────────────────────────────────────────────────────────────────
+
+LENGTH = struct.Struct(">I")
+
+
+def frame(packet: bytes) -> bytes:
+    return LENGTH.pack(len(packet)) + packet
+
+
+def parse_address(addr: str):
+    """``(scheme, target)``; target is ``(host, port)`` or a socket path."""
+    scheme, sep, rest = addr.partition("://")
+    if not sep or scheme not in ("tcp", "udp", "unix"):
+        raise ValueError(f"bad listener address {addr!r} (tcp://host:port, udp://host:port, unix:///path)")
+    if scheme == "unix":
+        return scheme, rest
+    host, _, port = rest.rpartition(":")
+    return scheme, (host.strip("[]") or "127.0.0.1", int(port))
+
+
+class FrameSender:
+    """Blocking client used by monitor.py; reconnects on the next send after an error."""
+
+    def __init__(self, addr: str, timeout=10.0):
+        self.scheme, self.target = parse_address(addr)
+        self.timeout = timeout
+        self.sock    = None
+
+    def _connect(self):
+        family = socket.AF_UNIX if self.scheme == "unix" else socket.AF_INET
+        kind   = socket.SOCK_DGRAM if self.scheme == "udp" else socket.SOCK_STREAM
+        sock = socket.socket(family, kind)
+        sock.settimeout(self.timeout)
+        sock.connect(self.target)
+        if self.scheme == "tcp":
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+
+    def send(self, packet: bytes):
+        if self.sock is None:
+            self._connect()
+        try:
+            self.sock.sendall(frame(packet))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class _Datagrams(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        srv = self.server
+        if len(data) < LENGTH.size or LENGTH.unpack_from(data)[0] != len(data) - LENGTH.size:
+            srv.bad += 1
+            return
+        try:
+            srv.queue.put_nowait((f"udp:{addr[0]}:{addr[1]}", data[LENGTH.size:]))
+            srv.frames_in += 1
+        except asyncio.QueueFull:
+            srv.dropped += 1
+
+
+class AlertServer:
+    def __init__(self, addr, handle, queue_max=QUEUE_MAX, max_frame=MAX_FRAME,
+                 stats_every=STATS_EVERY, log=print):
+        self.scheme, self.target = parse_address(addr)
+        self.addr        = addr
+        self.handle      = handle          # handle(source, packet), called in order of arrival
+        self.queue_max   = queue_max
+        self.max_frame   = max_frame
+        self.stats_every = stats_every
+        self.log         = log
+        self.connections = 0
+        self.accepted    = 0
+        self.frames_in   = 0
+        self.handled     = 0
+        self.dropped     = 0               # UDP datagrams that found the queue full
+        self.bad         = 0               # malformed or oversized frames
+        self._writers    = set()
+        self._clients    = set()           # connection tasks, awaited on shutdown
+        self._stop       = None
+        self._loop       = None
+
+    def stats(self) -> dict:
+        return {"connections": self.connections, "accepted": self.accepted,
+                "frames_in": self.frames_in, "handled": self.handled,
+                "queue": self.queue.qsize(), "dropped": self.dropped, "bad": self.bad}
+
+    async def _client(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        source = f"{self.scheme}:{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else f"unix:{self.accepted}"
+        self.connections += 1
+        self.accepted += 1
+        self._writers.add(writer)
+        self._clients.add(asyncio.current_task())
+        try:
+            while True:
+                n, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+                if n > self.max_frame:
+                    self.bad += 1
+                    self.log(f"[listener] {source}: {n}-byte frame exceeds {self.max_frame}, closing")
+                    break
+                packet = await reader.readexactly(n)
+                self.frames_in += 1
+                await self.queue.put((source, packet))     # blocks this connection while full
+        except asyncio.IncompleteReadError as e:
+            if e.partial and not self._stop.is_set():    # cut off by our own shutdown: not malformed
+                self.bad += 1
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self._writers.discard(writer)
+            self._clients.discard(asyncio.current_task())
+            writer.close()
+
+    def _handle_batch(self, batch):
+        for source, packet in batch:
+            try:
+                self.handle(source, packet)
+            except Exception as e:
+                self.log(f"[listener] handler failed for {source}: {e}")
+
+    async def _consume(self, handler):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < BATCH and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self._loop.run_in_executor(handler, self._handle_batch, batch)
+            self.handled += len(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _report(self):
+        last_in, last_done = 0, 0
+        while True:
+            await asyncio.sleep(self.stats_every)
+            s = self.stats()
+            self.log(f"[listener] {s['connections']} connections ({s['accepted']} total), "
+                     f"{(s['frames_in'] - last_in) / self.stats_every:,.0f} frames/s in, "
+                     f"{(s['handled'] - last_done) / self.stats_every:,.0f} handled/s, "
+                     f"queue {s['queue']}/{self.queue_max}, {s['dropped']} dropped, {s['bad']} bad")
+            last_in, last_done = s["frames_in"], s["handled"]
+
+    def stop(self):
+        """Begin a graceful shutdown (safe to call from any thread)."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def run(self, ready=None):
+        """Serve until ``stop()``; *ready* (a threading.Event) is set once listening."""
+        self._loop  = asyncio.get_running_loop()
+        self._stop  = asyncio.Event()
+        self.queue  = asyncio.Queue(self.queue_max)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self._stop.set)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass                       # Windows, or not the main thread
+
+        if self.scheme == "udp":
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _Datagrams(self), local_addr=self.target)
+            closer = transport.close
+        else:
+            if self.scheme == "unix":
+                Path(self.target).unlink(missing_ok=True)
+                server = await asyncio.start_unix_server(self._client, self.target)
+            else:
+                server = await asyncio.start_server(self._client, *self.target)
+            closer = server.close
+        handler = ThreadPoolExecutor(1, thread_name_prefix="alert-handler")
+        tasks = [asyncio.create_task(self._consume(handler)), asyncio.create_task(self._report())]
+        self.log(f"[listener] serving {self.addr}")
+        if ready is not None:
+            ready.set()
+
+        await self._stop.wait()
+        self.log("[listener] shutting down: no new connections, draining the queue …")
+        closer()
+        for w in list(self._writers):
+            w.close()
+        # readers blocked in queue.put (backpressure) still hold a frame each and
+        # may have more buffered: let them finish before waiting for the consumer
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        await self.queue.join()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        handler.shutdown(wait=True)
+        if self.scheme == "unix":
+            Path(self.target).unlink(missing_ok=True)
+        s = self.stats()
+        self.log(f"[listener] stopped: {s['accepted']} connections, {s['frames_in']} frames, "
+                 f"{s['handled']} handled, {s['dropped']} dropped, {s['bad']} bad")
+
+
+if __name__ == "__main__":
+    import os, time, argparse, threading
+    ap = argparse.ArgumentParser(description="alert server throughput with concurrent senders")
+    ap.add_argument("--addr", default="tcp://127.0.0.1:0")
+    ap.add_argument("--monitors", type=int, default=8)
+    ap.add_argument("--frames", type=int, default=20_000, help="per monitor")
+    args = ap.parse_args()
+
+    scheme, target = parse_address(args.addr)
+    if scheme == "tcp" and target[1] == 0:     # pick a free port
+        with socket.socket() as s:
+            s.bind((target[0], 0))
+            args.addr = f"tcp://{target[0]}:{s.getsockname()[1]}"
+    seen = {}
+    def handle(source, packet):
+        seen[source] = seen.get(source, 0) + 1
+
+    srv, ready = AlertServer(args.addr, handle, stats_every=1.0), threading.Event()
+    th = threading.Thread(target=asyncio.run, args=(srv.run(ready),))
+    th.start()
+    ready.wait()
+
+    packet = os.urandom(120)
+    def monitor():
+        tx = FrameSender(args.addr)
+        for _ in range(args.frames):
+            tx.send(packet)
+        tx.close()
+    t0 = time.perf_counter()
+    senders = [threading.Thread(target=monitor) for _ in range(args.monitors)]
+    for t in senders:
+        t.start()
+    for t in senders:
+        t.join()
+    last = -1
+    while srv.handled < srv.frames_in or srv.connections or srv.frames_in != last:
+        last = srv.frames_in                       # UDP has no close: wait until input goes quiet
+        time.sleep(0.2)
+    dt = time.perf_counter() - t0
+    srv.stop()
+    th.join()
+    total = args.monitors * args.frames
+    print(f"{args.monitors} monitors × {args.frames:,} frames: {srv.handled:,}/{total:,} handled "
+          f"in {dt:.2f} s ({srv.handled / dt:,.0f} frames/s), {len(seen)} sources, "
+          f"{srv.dropped} dropped at the queue, {total - srv.frames_in - srv.dropped} lost before it")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Decrypted alerts in an indexed SQLite database (``alerts.db``, WAL mode).
+
+    alerts(id, ts, timestamp, error, key_id, subkey, key_file, received)
+
+``ts`` is the alert's ``YYYY-MM-DD HH:MM:SS`` prefix, so it sorts and
+range-queries as text and works for both EST and EDT stamps.
+``timestamp`` keeps the original string.  There are indexes on ``ts`` and
+``key_id``.  The listener is the only writer.  It buffers alerts and commits
+them in batches of ``BATCH``.  A background thread commits whatever is
+buffered every ``FLUSH_S`` seconds, so a quiet period does not hold alerts
+back.  WAL lets the dashboard and the CLI read while it writes.  ``query``
+pages by id (keyset pagination): pass the last id of a page as ``before`` to
+get the next one, so deep pages cost the same as the first.
+
+Usage:  python src/alert_store.py [query] [--since TS] [--until TS] [--key ID] [--limit N] [--before ID]
+        python src/alert_store.py count [--since TS] [--until TS] [--key ID]
+        python src/alert_store.py bench [--alerts N]
+"""
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+ROOT      = Path(__file__).resolve().parents[1]
+ALERTS_DB = ROOT / "alerts.db"
+
+# ─── Configuration ──────────────────────────────────────────────────────────
+BATCH   = 256        # alerts per commit
+FLUSH_S = 0.5        # commit whatever is buffered at least this often
+PAGE    = 100
+# ─────────────────────────────────────────────────────────────────────────────
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id        INTEGER PRIMARY KEY,
+    ts        TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    error     REAL NOT NULL,
+    key_id    INTEGER,
+    subkey    INTEGER,
+    key_file  TEXT,
+    received  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_ts  ON alerts(ts);
+CREATE INDEX IF NOT EXISTS alerts_key ON alerts(key_id);
+"""
+FIELDS = ("id", "ts", "timestamp", "error", "key_id", "subkey", "key_file", "received")
+
+
+class AlertStore:
+    def __init__(self, path=ALERTS_DB, batch=BATCH, flush_s=FLUSH_S):
+        self.path    = Path(path)
+        self.batch   = batch
+        self.flush_s = flush_s
+        self.db      = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")    # WAL: durable up to the last checkpoint sync
+        self.db.executescript(SCHEMA)
+        self._rows    = []
+        self._lock    = threading.Lock()
+        self._closed  = threading.Event()
+        self._flusher = None                             # started by the first add()
+
+    def add(self, alert, key_id=None, subkey=None):
+        """Buffer one decrypted alert dict (``timestamp``, ``error``, ``key_file``)."""
+        ts = str(alert["timestamp"])
+        try:
+            key_id = int(key_id) if key_id is not None else None
+        except (TypeError, ValueError):
+            key_id = None
+        with self._lock:
+            self._rows.append((ts[:19], ts, float(alert["error"]), key_id, subkey,
+                               alert.get("key_file"), time.time()))
+            if len(self._rows) >= self.batch:
+                self._commit()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="alert-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_s):
+            self.flush()
+
+    def _commit(self):
+        if self._rows:
+            with self.db:
+                self.db.executemany(
+                    "INSERT INTO alerts (ts, timestamp, error, key_id, subkey, key_file, received) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", self._rows)
+            self._rows = []
+
+    def flush(self):
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _where(since, until, key_id, before=None):
+        clauses, args = [], []
+        for cond, value in (("ts >= ?", since), ("ts < ?", until),
+                            ("key_id = ?", key_id), ("id < ?", before)):
+            if value is not None:
+                clauses.append(cond)
+                args.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def query(self, since=None, until=None, key_id=None, limit=PAGE, before=None):
+        """Newest-first alerts with ``since <= ts < until`` (either may be omitted).
+
+        Returns a list of dicts; the next page is ``before=page[-1]["id"]``.
+        """
+        where, args = self._where(since, until, key_id, before)
+        with self._lock:
+            rows = self.db.execute(f"SELECT {', '.join(FIELDS)} FROM alerts{where} "
+                                   f"ORDER BY id DESC LIMIT ?", args + [limit]).fetchall()
+        return [dict(zip(FIELDS, r)) for r in rows]
+
+    def count(self, since=None, until=None, key_id=None):
+        where, args = self._where(since, until, key_id)
+        with self._lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM alerts{where}", args).fetchone()[0]
+
+    def latest(self, n=5):
+        """The *n* newest committed alerts, oldest first."""
+        return self.query(limit=n)[::-1]
+
+
+if __name__ == "__main__":
+    import json, argparse, tempfile
+    ap = argparse.ArgumentParser(description="query the listener's alert store")
+    ap.add_argument("cmd", nargs="?", default="query", choices=["query", "count", "bench"])
+    ap.add_argument("--db", type=Path, default=ALERTS_DB)
+    ap.add_argument("--since", help="inclusive, e.g. '2025-06-08 12:00:00'")
+    ap.add_argument("--until", help="exclusive")
+    ap.add_argument("--key", type=int, help="key id")
+    ap.add_argument("--limit", type=int, default=PAGE)
+    ap.add_argument("--before", type=int, help="id cursor: last id of the previous page")
+    ap.add_argument("--alerts", type=int, default=200_000, help="bench: alerts to insert")
+    args = ap.parse_args()
+
+    if args.cmd == "bench":
+        with tempfile.TemporaryDirectory() as d, AlertStore(Path(d) / "alerts.db") as store:
+            t0 = time.perf_counter()
+            for i in range(args.alerts):
+                s = 1_750_000_000 + i
+                store.add({"timestamp": time.strftime("%Y-%m-%d %H:%M:%S EDT", time.gmtime(s)),
+                           "error": 3.3e6 + i, "key_file": f"{i // 4}.bin"}, key_id=i // 4)
+            store.flush()
+            dt = time.perf_counter() - t0
+            print(f"insert  {args.alerts:,} alerts in {dt:.2f} s ({args.alerts / dt:,.0f} alerts/s)")
+            mid = store.query(limit=1, before=args.alerts // 2)[0]
+            for name, fn in [
+                ("latest 5", lambda: store.latest(5)),
+                ("1 h range", lambda: store.query(since=mid["ts"][:13] + ":00:00",
+                                                  until=mid["ts"][:13] + ":59:60", limit=10_000)),
+                ("key id", lambda: store.query(key_id=mid["key_id"])),
+                ("deep page", lambda: store.query(before=mid["id"] // 2, limit=PAGE)),
+                ("count 1 h", lambda: store.count(since=mid["ts"][:13] + ":00:00",
+                                                  until=mid["ts"][:13] + ":59:60")),
+            ]:
+                t0 = time.perf_counter()
+                n = len(r) if isinstance(r := fn(), list) else r
+                print(f"{name:<10} {n:>6,} rows in {(time.perf_counter() - t0) * 1e3:7.2f} ms")
+    else:
+        if not args.db.exists():
+            ap.error(f"{args.db} does not exist; run listener.py first")
+        with AlertStore(args.db) as store:
+            if args.cmd == "count":
+                print(store.count(args.since, args.until, args.key))
+            else:
+                for a in store.query(args.since, args.until, args.key, args.limit, args.before):
+                    print(json.dumps(a))
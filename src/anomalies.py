@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Vectorized fault and attack injection for labelled benchmark corpora.
+
+``inject(cols, spec, seed)`` modifies a ``{column: float array}`` dict (the
+shape ``feature_store.load_features`` returns, as writable copies) in place
+and returns the injected events as intervals; ``row_labels`` turns those into
+per-row ground truth.  All events of one kind are applied in a single pass
+over flat (row, event, offset) index arrays, so the cost is one pass over the
+rows they touch plus one over the labels.
+
+Kinds and their per-event parameters; ``(lo, hi)`` is drawn uniformly per
+event, a single number is used for every event, ``sign`` is a random ±1:
+
+    sag      voltage drops to (1 - depth) of its value
+    swell    voltage rises by gain
+    spike    1-3 rows scaled by 1 ± gain
+    ramp     linear change reaching ± slope (relative) at the event end
+    drift    additive creep reaching ± creep column-stds at the event end
+    stuck    sensor frozen at the value of the event's first row
+    replay   rows replaced by the ones recorded ``delay`` rows earlier
+    fdi      false-data injection: ± bias column-stds added
+    skew     timestamps shifted by ± skew seconds
+    loss     packet loss: values become NaN
+
+A spec is a list of kind names or dicts overriding ``KINDS`` entries, e.g.
+``[{"kind": "sag", "rate": 1e-4, "depth": (0.3, 0.5), "length": 20}, "spike"]``;
+``rate`` is events per row, so an entry injects Poisson(rate · rows)
+events; those that do not fit in the rows are dropped.  Each entry draws from its own stream keyed by
+(seed, entry number).
+
+Benchmark / corpus:  python src/anomalies.py [--rows N] [--seed S] [--save DIR]
+"""
+import numpy as np
+
+VOLTAGE = ("V_real", "V_imag", "V_node1")
+POWER   = ("P_node1", "Q_node1")
+
+# ─── Configuration ──────────────────────────────────────────────────────────
+KINDS = {
+    "sag":    dict(cols=VOLTAGE,         rate=2e-5, length=(10, 300),   depth=(0.1, 0.6)),
+    "swell":  dict(cols=VOLTAGE,         rate=2e-5, length=(10, 300),   gain=(0.1, 0.4)),
+    "spike":  dict(cols=VOLTAGE,         rate=2e-4, length=(1, 3),      gain=(1.0, 4.0)),
+    "ramp":   dict(cols=POWER,           rate=1e-5, length=(30, 300),   slope=(0.2, 1.0)),
+    "drift":  dict(cols=VOLTAGE,         rate=2e-6, length=(600, 3600), creep=(0.5, 3.0)),
+    "stuck":  dict(cols=VOLTAGE + POWER, rate=1e-5, length=(30, 600)),
+    "replay": dict(cols=VOLTAGE + POWER, rate=1e-5, length=(60, 600),   delay=(300, 3600)),
+    "fdi":    dict(cols=POWER,           rate=1e-5, length=(30, 600),   bias=(1.0, 4.0)),
+    "skew":   dict(cols=("time",),       rate=1e-5, length=(30, 600),   skew=(0.5, 5.0)),
+    "loss":   dict(cols=VOLTAGE + POWER, rate=5e-5, length=(1, 10)),
+}
+INTEGER = {"length", "delay"}        # drawn as integers, inclusive range
+SIGNED  = {"spike", "ramp", "drift", "fdi", "skew"}
+# ─────────────────────────────────────────────────────────────────────────────
+
+INTERVAL = np.dtype([("start", np.int64), ("stop", np.int64), ("kind", "U8")])
+
+# new values for x[r]; e = event per row, o = offset in the event, p = per-event params
+_OPS = {
+    "sag":    lambda x, r, e, o, L, p, s: x[r] * (1 - p["depth"][e]),
+    "swell":  lambda x, r, e, o, L, p, s: x[r] * (1 + p["gain"][e]),
+    "spike":  lambda x, r, e, o, L, p, s: x[r] * (1 + p["sign"][e] * p["gain"][e]),
+    "ramp":   lambda x, r, e, o, L, p, s: x[r] * (1 + p["sign"][e] * p["slope"][e] * (o + 1) / L[e]),
+    "drift":  lambda x, r, e, o, L, p, s: x[r] + p["sign"][e] * p["creep"][e] * s * (o + 1) / L[e],
+    "stuck":  lambda x, r, e, o, L, p, s: x[r - o],
+    "replay": lambda x, r, e, o, L, p, s: x[r - p["delay"][e]],
+    "fdi":    lambda x, r, e, o, L, p, s: x[r] + p["sign"][e] * p["bias"][e] * s,
+    "skew":   lambda x, r, e, o, L, p, s: x[r] + p["sign"][e] * p["skew"][e],
+    "loss":   lambda x, r, e, o, L, p, s: np.nan,
+}
+
+
+def _spans(starts, lengths):
+    """Flat (row, event, offset) arrays covering every event's rows."""
+    event = np.repeat(np.arange(len(starts)), lengths)
+    offset = np.arange(len(event)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[event] + offset, event, offset
+
+
+def _draw(rng, kind, params, n):
+    count = int(rng.poisson(params["rate"] * n))
+    p = {}
+    for name, value in params.items():
+        if name in ("cols", "rate"):
+            continue
+        if isinstance(value, (tuple, list)):              # lists: ranges from a JSON grid
+            lo, hi = value
+            p[name] = rng.integers(lo, hi + 1, count) if name in INTEGER else rng.uniform(lo, hi, count)
+        else:                                             # a fixed value for every event
+            p[name] = np.full(count, value, np.int64 if name in INTEGER else float)
+    if kind in SIGNED:
+        p["sign"] = rng.choice([-1.0, 1.0], count)
+    L, first = p["length"], p.get("delay", np.zeros(count, np.int64))
+    room = n - L - first                                  # start ∈ [first, n - L]
+    keep = room >= 0
+    p = {k: v[keep] for k, v in p.items()}
+    p["start"] = p.get("delay", np.zeros(keep.sum(), np.int64)) + \
+        (rng.random(keep.sum()) * (room[keep] + 1)).astype(np.int64)
+    return p
+
+
+def inject(cols, spec=None, seed=0):
+    """Inject the events of *spec* (default: every kind) into *cols* in place.
+
+    Returns a structured array of ``(start, stop, kind)`` intervals, sorted by start.
+    """
+    n = len(next(iter(cols.values())))
+    scale = {c: float(np.nanstd(x)) or 1.0 for c, x in cols.items()}
+    out = []
+    for i, entry in enumerate(spec if spec is not None else list(KINDS)):
+        entry = {"kind": entry} if isinstance(entry, str) else dict(entry)
+        kind = entry.pop("kind")
+        if kind not in KINDS:
+            raise ValueError(f"unknown anomaly kind {kind!r}")
+        params = {**KINDS[kind], **entry}
+        p = _draw(np.random.default_rng([seed, i]), kind, params, n)
+        if not len(p["start"]):
+            continue
+        L = p["length"]
+        r, e, o = _spans(p["start"], L)
+        op = _OPS[kind]
+        for c in params["cols"]:
+            if c in cols:
+                x = cols[c]
+                x[r] = op(x, r, e, o, L, p, scale[c])
+        iv = np.empty(len(L), INTERVAL)
+        iv["start"], iv["stop"], iv["kind"] = p["start"], p["start"] + L, kind
+        out.append(iv)
+    iv = np.concatenate(out) if out else np.empty(0, INTERVAL)
+    return iv[np.argsort(iv["start"], kind="stable")]
+
+
+def row_labels(n, intervals, kind=None):
+    """int8 per-row ground truth: 1 inside any interval (of *kind*, if given)."""
+    if kind is not None:
+        intervals = intervals[intervals["kind"] == kind]
+    d = (np.bincount(intervals["start"], minlength=n + 1)
+         - np.bincount(intervals["stop"], minlength=n + 1))
+    return (np.cumsum(d[:n]) > 0).astype(np.int8)
+
+
+if __name__ == "__main__":
+    import sys, time, json, argparse
+    from pathlib import Path
+    from feature_store import load_features
+    ap = argparse.ArgumentParser(description="anomaly injection benchmark / corpus builder")
+    ap.add_argument("--rows", type=int, default=5_000_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--save", type=Path, help="write the corpus as .npy columns here")
+    args = ap.parse_args()
+
+    base = load_features()
+    reps = -(-args.rows // len(base["time"]))
+    cols = {c: np.tile(np.asarray(base[c], dtype=float), reps)[:args.rows]
+            for c in VOLTAGE + POWER + ("time",)}
+    cols["time"] = np.arange(args.rows, dtype=float)
+
+    t0 = time.perf_counter()
+    iv = inject(cols, seed=args.seed)
+    label = row_labels(args.rows, iv)
+    dt = time.perf_counter() - t0
+    kinds, counts = np.unique(iv["kind"], return_counts=True)
+    print(f"{args.rows:,} rows, {len(iv):,} events in {dt:.2f} s ({args.rows / dt:,.0f} rows/s); "
+          f"{label.mean():.1%} of rows labelled")
+    print("  " + "  ".join(f"{k} {c:,}" for k, c in zip(kinds, counts)))
+
+    if args.save:
+        args.save.mkdir(parents=True, exist_ok=True)
+        for c, x in {**cols, "label": label}.items():
+            np.save(args.save / f"{c}.npy", x)
+        np.save(args.save / "intervals.npy", iv)
+        (args.save / "meta.json").write_text(json.dumps(
+            {"rows": args.rows, "seed": args.seed, "columns": [*cols, "label"]}, indent=1))
+        print(f"✓ corpus → {args.save}", file=sys.stderr)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Decrypted alerts/s of the listener pipeline versus decryption worker count.
+
+Seals ``--alerts`` packets from ``--sources`` interleaved monitors with fresh
+keys.  ``--derived`` uses HKDF subkeys, as with ``SUBKEYS_PER_KEY``.  The
+packets are then pushed through ``listener.decrypt`` on an ``OrderedPool``
+for each worker count.  The emitter checks that every source's alerts come
+out in the order they were sent.  With ``--store`` it also writes them to a
+temporary alert store, as the listener does.
+
+Usage:  python src/bench_listener.py [--alerts N] [--sources N] [--workers 0,1,2,4,8] [--derived] [--store]
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from packet import seal
+from listener import decrypt
+from ordered_pool import OrderedPool
+from alert_store import AlertStore
+
+
+def make_packets(n, sources, derived):
+    keys, packets = {}, []
+    for i in range(n):
+        key_id = 1_750_000_000_000_000 + (i // 64 if derived else i)
+        key = keys.setdefault(key_id, os.urandom(32))
+        src = i % sources
+        alert = {"timestamp": f"2025-06-08 12:{i // 60 % 60:02d}:{i % 60:02d} EDT",
+                 "error": 3.3e6 + i, "key_file": f"{key_id}.bin", "source": src, "seq": i // sources}
+        packets.append((f"monitor-{src}", seal(key, key_id, json.dumps(alert).encode(),
+                                               os.urandom(12), i % 64 if derived else None)))
+    return keys, packets
+
+
+def run(packets, keys, workers, store=None):
+    last, bad = {}, 0
+    def emit(source, packet, result, error):
+        nonlocal bad
+        if error is not None:
+            raise error
+        alert = result[0]
+        if alert["seq"] != last.get(source, -1) + 1:
+            bad += 1
+        last[source] = alert["seq"]
+        if store is not None:
+            store.add(alert, result[1], result[2])
+
+    pool = OrderedPool(lambda p: decrypt(p, keys.__getitem__), emit, workers)
+    t0 = time.perf_counter()
+    for source, packet in packets:
+        pool.submit(source, packet)
+    pool.close()
+    if store is not None:
+        store.flush()
+    return time.perf_counter() - t0, bad
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--alerts", type=int, default=50_000)
+    ap.add_argument("--sources", type=int, default=8)
+    ap.add_argument("--workers", default="0,1,2,4,8")
+    ap.add_argument("--derived", action="store_true", help="HKDF subkeys (64 alerts per key)")
+    ap.add_argument("--store", action="store_true", help="also write every alert to an alert store")
+    args = ap.parse_args()
+
+    keys, packets = make_packets(args.alerts, args.sources, args.derived)
+    print(f"{args.alerts:,} alerts from {args.sources} sources"
+          f"{', derived keys' if args.derived else ''}{', stored' if args.store else ''}; "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>8} {'alerts/s':>10} {'order':>8}")
+    for w in (int(x) for x in args.workers.split(",")):
+        with tempfile.TemporaryDirectory() as d:
+            store = AlertStore(Path(d) / "alerts.db") if args.store else None
+            dt, bad = run(packets, keys, w, store)
+            if store is not None:
+                store.close()
+        print(f"{w:>8} {dt:>8.2f} {args.alerts / dt:>10,.0f} {'ok' if not bad else f'{bad} bad':>8}")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Cold-start breakdown for the scripts that load the autoencoder.
+
+Each scenario runs in a fresh interpreter and times its phases: importing
+torch, importing the given module, loading the weights, and the first
+forward pass.
+
+Usage:  python src/bench_startup.py [--runs N]
+"""
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent
+
+PROBE = r"""
+import sys, time, json
+sys.path.insert(0, {src!r})
+t0 = time.perf_counter()
+import torch
+t1 = time.perf_counter()
+import {module}
+t2 = time.perf_counter()
+from model import load_model, COLS
+net = load_model()
+t3 = time.perf_counter()
+with torch.inference_mode():
+    net(torch.zeros(1, 10, len(COLS)))
+t4 = time.perf_counter()
+print(json.dumps({{"torch": t1 - t0, "import": t2 - t1, "weights": t3 - t2, "first_pass": t4 - t3}}))
+"""
+
+# what each entry point imports before its model is ready
+SCENARIOS = {
+    "model":            "model",
+    "monitor deps":     "model, packet, key_vault, key_allocator, key_bus, csv_tail, ring_window",
+    "inject_anomalies": "inject_anomalies",
+}
+
+
+def probe(modules):
+    out = subprocess.run([sys.executable, "-c", PROBE.format(src=str(SRC), module=modules)],
+                         capture_output=True, text=True, check=True, cwd=SRC)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=3, help="fresh interpreters per scenario (best is kept)")
+    args = ap.parse_args()
+
+    print(f"{'scenario':<18}{'torch':>9}{'import':>9}{'weights':>9}{'1st pass':>10}   (ms, best of {args.runs})")
+    for name, modules in SCENARIOS.items():
+        runs = [probe(modules) for _ in range(args.runs)]
+        best = {k: min(r[k] for r in runs) * 1e3 for k in runs[0]}
+        print(f"{name:<18}{best['torch']:9.0f}{best['import']:9.1f}{best['weights']:9.1f}"
+              f"{best['first_pass']:10.1f}")
@@ -0,0 +1,67 @@
+"""Incremental, byte-offset tailer for append-only text/CSV files.
+
+``poll()`` reads only the bytes appended since the previous call and returns
+the complete new lines; a trailing line without its newline is held back
+until the writer finishes it.  If the file is replaced (different inode) or
+truncated (smaller than our offset) reading restarts from the beginning;
+the first bytes of the file are kept as a fingerprint so a replacement that
+happens to reuse the inode number is caught too.
+"""
+import os
+
+
+class CsvTailer:
+    def __init__(self, path, max_bytes=64 << 20):
+        self.path      = path
+        self.max_bytes = max_bytes         # cap per poll so a huge backlog is paged
+        self.offset    = 0
+        self.inode     = None
+        self.partial   = b""
+        self.head      = b""               # fingerprint: first HEAD_LEN bytes seen
+        self.rotations = 0
+
+    HEAD_LEN = 64
+
+    def _rewind(self):
+        self.offset, self.partial, self.head = 0, b"", b""
+        self.rotations += 1
+
+    def _check_rotation(self, st, f):
+        if self.inode is None:
+            self.inode = st.st_ino
+            return
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self._rewind()
+        elif self.head and f.read(len(self.head)) != self.head:
+            self._rewind()
+        self.inode = st.st_ino
+
+    def poll(self):
+        """Return the list of complete lines appended since the last poll."""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            st = os.fstat(f.fileno())
+            self._check_rotation(st, f)
+            if st.st_size == self.offset:
+                return []
+            f.seek(self.offset)
+            data = f.read(self.max_bytes)
+        if len(self.head) < self.HEAD_LEN:
+            self.head = (self.head + data)[:self.HEAD_LEN]
+        self.offset += len(data)
+        data = self.partial + data
+        cut = data.rfind(b"\n") + 1
+        self.partial = data[cut:]
+        if not cut:
+            return []
+        return data[:cut].decode("utf-8", errors="replace").splitlines()
+
+    def pending(self) -> bool:
+        """True if a poll was cut short by ``max_bytes``."""
+        try:
+            return os.stat(self.path).st_size > self.offset
+        except FileNotFoundError:
+            return False
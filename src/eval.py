@@ -4,55 +4,51 @@ from pathlib import Path
 # --- import order matters ---------------------------------------------------
 import numpy as np            # <- import numpy FIRST
 import torch
-import pandas as pd
 from sklearn.metrics import classification_report
-from inject_anomalies import AE, COLS, SEQ
+from model import COLS, SEQ, load_model
+from eval_engine import evaluate
+from feature_store import load_features, feature_matrix
 # ---------------------------------------------------------------------------
 
 # Project root
 ROOT = Path(__file__).resolve().parents[1]
 
+EXACT = True    # False: use the incremental scorer (streaming_ae.py), which is
+                #        faster but approximate, instead of the full autoencoder
+CHUNK = 4096    # windows per pass; bounds peak memory on long recordings
+
 # --- Load the trained model safely -----------------------------------------
-state_dict = torch.load(
-    ROOT / "model" / "lstm_ae.pt",
-    map_location="cpu",
-    weights_only=True     # safer loading in PyTorch 2.x
-)
-net = AE(len(COLS))
-net.load_state_dict(state_dict)
-net.eval()
+net = load_model(ROOT / "model" / "lstm_ae.pt")   # weights_only: safer loading in PyTorch 2.x
 
 # ---------- Prepare dataset ------------------------------------------------
-df = pd.read_csv(ROOT / "data" / "annotated.csv").ffill()
-
-# extract real/imag parts of complex voltage
-df["V_real"] = df["voltage_C"].str.extract(r"([-+]?\d*\.?\d+)").astype(float)
-df["V_imag"] = df["voltage_C"].str.extract(r"\+(\d*\.?\d+)j").astype(float)
-
-# map string labels to integers (0/1)
-df["label"] = df["label"].astype(str).map({"False": 0, "True": 1})
+# derived columns (V_real/V_imag, 0/1 labels) are parsed from the CSV once and
+# memory-mapped from data/features/ afterwards (feature_store.py)
+feats = load_features(ROOT / "data" / "annotated.csv")
 
 # build sequential tensor data
-data = torch.tensor(df[COLS].values, dtype=torch.float32)
-seqs = torch.stack([data[i:i+SEQ] for i in range(len(data) - SEQ)])
+data = torch.from_numpy(feature_matrix(feats, COLS))
 
 # ---------- Compute reconstruction errors ----------------------------------
-with torch.no_grad():
-    recon = net(seqs)
-errors = ((recon - seqs) ** 2).mean(dim=(1, 2)).cpu().numpy()
+# chunked engine (eval_engine.py): errors go into one preallocated array;
+# the metrics below come from the full autoencoder unless EXACT is turned off
+errors, stats = evaluate(net, data, SEQ, count=len(data) - SEQ, chunk=CHUNK, exact=EXACT)
 
 # dynamic threshold = mean + 3*std
 thr = errors.mean() + 3 * errors.std()
 
 # predictions and ground truth as ints
 pred_int = (errors > thr).astype(int)
-true_int = df["label"].iloc[SEQ:].values.astype(int)
+true_int = feats["label"][SEQ:].astype(int)
 
 # diagnostic prints (uncomment if needed)
 # print("unique true:", np.unique(true_int), "dtype:", true_int.dtype)
 # print("unique pred:", np.unique(pred_int), "dtype:", pred_int.dtype)
 
 # ---------- Report results -------------------------------------------------
+rss = stats["peak_rss_mb"]
+print(f"scored {stats['windows']:,} windows in {stats['seconds']:.2f} s "
+      f"({stats['windows_per_s']:,.0f} windows/s), peak RSS "
+      + (f"{rss:,.0f} MB" if rss is not None else "n/a"))
 print(f"threshold = {thr:.4e}")
 print(classification_report(
     true_int,
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Evaluation results cached on disk per (model, dataset, scoring mode).
+
+An entry lives in
+
+    data/eval_cache/<model sha>-<dataset sha>-<exact|fast>-v<EVAL_VERSION>/
+
+with the per-window errors (``errors.npy``) and ``result.json``: threshold,
+error stats, scoring throughput, the classification report and a histogram.
+The hashes come from ``feature_store.source_hash``, so an unchanged file is
+not re-read.  ``ensure`` returns a finished entry immediately; otherwise it
+starts one background thread per key (shared by every caller in the
+process, e.g. all dashboard sessions) and returns the newest older entry so
+there is something to show meanwhile.  Bump ``EVAL_VERSION`` whenever the
+computed fields change.
+
+Scoring is exact (the full autoencoder) unless ``exact=False`` asks for the
+incremental approximation.
+
+Precompute from the shell:  python src/eval_cache.py [--fast]
+"""
+import os
+import json
+import shutil
+import threading
+from pathlib import Path
+import numpy as np
+from feature_store import DATA_PATH, source_hash
+
+ROOT         = Path(__file__).resolve().parents[1]
+MODEL_PATH   = ROOT / "model" / "lstm_ae.pt"
+CACHE_DIR    = ROOT / "data" / "eval_cache"
+EVAL_VERSION = 1
+BINS         = 40
+KEEP         = 8          # entries kept; older ones are pruned after each build
+
+_lock    = threading.Lock()
+_running = {}             # entry name → Thread
+_errors  = {}             # entry name → exception text of the last failed build
+
+
+def entry_name(model_path=MODEL_PATH, data_path=DATA_PATH, exact=True):
+    return (f"{source_hash(model_path)[:16]}-{source_hash(data_path)[:16]}-"
+            f"{'exact' if exact else 'fast'}-v{EVAL_VERSION}")
+
+
+def _read(entry):
+    try:
+        result = json.loads((entry / "result.json").read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    result["entry"] = entry.name
+    return result
+
+
+def errors(result, cache=CACHE_DIR):
+    """Per-window errors of a cached *result* (memory-mapped)."""
+    return np.load(Path(cache) / result["entry"] / "errors.npy", mmap_mode="r")
+
+
+def compute(model_path=MODEL_PATH, data_path=DATA_PATH, exact=True, cache=CACHE_DIR):
+    """Evaluate and store one entry; returns its result dict."""
+    import torch
+    from sklearn.metrics import classification_report
+    from model import COLS, SEQ, load_model
+    from eval_engine import evaluate
+    from feature_store import load_features, feature_matrix
+
+    cache = Path(cache)
+    entry = cache / entry_name(model_path, data_path, exact)
+    feats = load_features(data_path)
+    x = torch.from_numpy(feature_matrix(feats, COLS))
+    errs, stats = evaluate(load_model(model_path, len(COLS)), x, SEQ, count=len(x) - SEQ, exact=exact)
+    thr = float(errs.mean() + 3 * errs.std())
+    true = feats["label"][SEQ:].astype(int)
+    pred = (errs > thr).astype(int)
+    counts, edges = np.histogram(errs, bins=BINS)
+    result = {
+        "model": str(model_path), "data": str(data_path), "exact": exact, "seq": SEQ,
+        "threshold": thr, "mean": float(errs.mean()), "std": float(errs.std()),
+        "stats": stats,
+        "report": classification_report(true, pred, digits=4, output_dict=True, zero_division=0),
+        "hist": {"counts": counts.tolist(), "edges": edges.tolist()},
+    }
+
+    tmp = entry.with_name(entry.name + f".tmp{os.getpid()}-{threading.get_ident()}")
+    tmp.mkdir(parents=True, exist_ok=True)
+    np.save(tmp / "errors.npy", errs)
+    (tmp / "result.json").write_text(json.dumps(result, indent=1))
+    try:
+        os.replace(tmp, entry)
+    except OSError:                                   # someone else finished it first
+        shutil.rmtree(tmp, ignore_errors=True)
+    done = sorted((d for d in cache.iterdir() if d.is_dir() and ".tmp" not in d.name),
+                  key=lambda d: d.stat().st_mtime, reverse=True)
+    for old in done[KEEP:]:
+        shutil.rmtree(old, ignore_errors=True)
+    return _read(entry)
+
+
+def latest(cache=CACHE_DIR, exact=None):
+    """Newest finished entry (optionally of one scoring mode), or None."""
+    cache = Path(cache)
+    if not cache.is_dir():
+        return None
+    mode = None if exact is None else ("-exact-" if exact else "-fast-")
+    done = [d for d in cache.iterdir()
+            if d.is_dir() and ".tmp" not in d.name and (mode is None or mode in d.name)]
+    for d in sorted(done, key=lambda d: d.stat().st_mtime, reverse=True):
+        result = _read(d)
+        if result:
+            return result
+    return None
+
+
+def ensure(model_path=MODEL_PATH, data_path=DATA_PATH, exact=True, cache=CACHE_DIR):
+    """``(result, state)``.
+
+    *state* is ``"ready"`` (result matches the inputs), ``"running"`` (a
+    background build is under way; result is the newest older entry or None)
+    or ``"failed: …"`` (the last build raised; call again to retry).
+    """
+    name = entry_name(model_path, data_path, exact)
+    result = _read(Path(cache) / name)
+    if result:
+        return result, "ready"
+    with _lock:
+        if name in _errors:
+            return latest(cache, exact), f"failed: {_errors.pop(name)}"
+        if name not in _running or not _running[name].is_alive():
+            def build():
+                try:
+                    compute(model_path, data_path, exact, cache)
+                except Exception as e:
+                    with _lock:
+                        _errors[name] = f"{type(e).__name__}: {e}"
+            _running[name] = threading.Thread(target=build, name=f"eval-{name}", daemon=True)
+            _running[name].start()
+    return latest(cache, exact), "running"
+
+
+if __name__ == "__main__":
+    import argparse, time
+    ap = argparse.ArgumentParser(description="precompute the dashboard's evaluation cache")
+    ap.add_argument("--model", type=Path, default=MODEL_PATH)
+    ap.add_argument("--data", type=Path, default=DATA_PATH)
+    ap.add_argument("--fast", action="store_true", help="approximate incremental scorer")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    exact = not args.fast
+    result = _read(CACHE_DIR / entry_name(args.model, args.data, exact))
+    if result:
+        print(f"✓ cached: {result['entry']} ({(time.perf_counter() - t0) * 1e3:.1f} ms)")
+    else:
+        result = compute(args.model, args.data, exact)
+        print(f"✓ computed {result['entry']} in {time.perf_counter() - t0:.2f} s "
+              f"(threshold {result['threshold']:.3e})")
@@ -0,0 +1,57 @@
+"""Bounded-memory scoring of a whole recording.
+
+Windows go through the model ``chunk`` at a time and their errors land in
+one preallocated float32 array, so peak memory is the series itself plus a
+chunk of windows, whatever the recording length.  ``evaluate`` also reports
+throughput and the process' peak RSS.
+"""
+import sys
+import time
+import numpy as np
+import torch
+from windows import iter_windows
+from streaming_ae import score_series
+
+CHUNK = 4096    # windows per forward pass
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:                   # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2**20
+        except (ImportError, AttributeError):
+            return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10   # bytes vs kB
+
+
+@torch.no_grad()
+def score_windows(net, x, seq, count=None, chunk=CHUNK, exact=True):
+    """Reconstruction error of windows ``x[i:i+seq]`` for i < *count*.
+
+    ``exact`` runs the full autoencoder on every window; ``exact=False``
+    opts into the faster, approximate incremental scorer (streaming_ae.py)."""
+    x = torch.as_tensor(x, dtype=torch.float32)
+    n = max(len(x) - seq + 1, 0)
+    count = n if count is None else min(count, n)
+    errors = np.empty(count, dtype=np.float32)
+    if exact:
+        for start, w in iter_windows(x, seq, chunk, count):
+            errors[start:start + len(w)] = ((net(w) - w) ** 2).mean(dim=(1, 2)).numpy()
+    else:
+        score_series(net, x[:count + seq - 1], seq, chunk=chunk, out=errors)
+    return errors
+
+
+def evaluate(net, x, seq, count=None, chunk=CHUNK, exact=True):
+    """``(errors, stats)`` with windows, seconds, windows_per_s and peak_rss_mb."""
+    t0 = time.perf_counter()
+    errors = score_windows(net, x, seq, count, chunk, exact)
+    dt = time.perf_counter() - t0
+    return errors, {"windows": len(errors), "seconds": dt,
+                    "windows_per_s": len(errors) / dt if dt else float("inf"),
+                    "peak_rss_mb": peak_rss_mb()}
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Content-addressed cache of the features derived from a recorder CSV.
+
+The first load of a CSV parses it once (ffill, phasor split, labels) and
+writes every derived column as a ``.npy`` file under
+
+    data/features/<csv stem>-<hash of its path>-<sha256 of the CSV>-v<PREPROC_VERSION>/
+
+Later loads memory-map those files, so only the pages actually used are
+read.  Each CSV path keeps one entry; a rebuild removes that path's older
+ones only.  The CSV stays the export format; bump ``PREPROC_VERSION`` whenever
+``derive`` changes.  Content hashes are remembered per (size, mtime) in
+``data/features/hashes.json`` so an unchanged CSV is not re-hashed.
+
+Cold vs warm load times:  python src/feature_store.py [CSV]
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from phasor import parse_complex
+
+ROOT            = Path(__file__).resolve().parents[1]
+DATA_PATH       = ROOT / "data" / "annotated.csv"
+STORE_DIR       = ROOT / "data" / "features"
+PREPROC_VERSION = 1
+
+
+def source_hash(path: Path, store=STORE_DIR) -> str:
+    path, st = Path(path).resolve(), Path(path).stat()
+    index_path = Path(store) / "hashes.json"
+    try:
+        index = json.loads(index_path.read_text())
+    except (FileNotFoundError, ValueError):
+        index = {}
+    hit = index.get(str(path))
+    if hit and hit[:2] == [st.st_size, st.st_mtime_ns]:
+        return hit[2]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    index[str(path)] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(index, indent=1))
+    os.replace(tmp, index_path)
+    return h.hexdigest()
+
+
+def derive(path: Path) -> dict:
+    """Parse an annotated CSV into numeric feature columns."""
+    df = pd.read_csv(path).ffill()
+    v_real, v_imag = parse_complex(df["voltage_C"])
+    feats = {"V_real": v_real, "V_imag": v_imag}
+    for col in ("P_node1", "Q_node1", "V_node1", "time"):
+        feats[col] = df[col].to_numpy(dtype=float)
+    feats["label"] = (df["label"].astype(str) == "True").to_numpy(dtype=np.int8)
+    return feats
+
+
+def _prefix(path: Path) -> str:
+    """Entry name prefix owned by one CSV: same-named files elsewhere get their own."""
+    return f"{path.stem}-{hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:8]}"
+
+
+def _entry(path: Path, store: Path) -> Path:
+    return store / f"{_prefix(path)}-{source_hash(path, store)[:16]}-v{PREPROC_VERSION}"
+
+
+def load_features(path=DATA_PATH, store=STORE_DIR) -> dict:
+    """``{column: array}`` for *path*, memory-mapped from the store (built on a miss)."""
+    path, store = Path(path), Path(store)
+    entry = _entry(path, store)
+    if not (entry / "meta.json").exists():
+        feats = derive(path)
+        tmp = entry.with_name(entry.name + f".tmp{os.getpid()}")
+        tmp.mkdir(parents=True, exist_ok=True)
+        for name, arr in feats.items():
+            np.save(tmp / f"{name}.npy", arr)
+        (tmp / "meta.json").write_text(json.dumps(
+            {"source": str(path.resolve()), "rows": len(feats["time"]), "version": PREPROC_VERSION,
+             "columns": list(feats)}, indent=1))
+        try:
+            os.replace(tmp, entry)
+        except OSError:                           # another process built it first
+            shutil.rmtree(tmp, ignore_errors=True)
+        stale = re.compile(rf"{re.escape(_prefix(path))}-[0-9a-f]{{16}}-v\d+")
+        for old in store.iterdir():               # older builds of this very file
+            if old != entry and old.is_dir() and stale.fullmatch(old.name):
+                shutil.rmtree(old, ignore_errors=True)
+    meta = json.loads((entry / "meta.json").read_text())
+    # copy-on-write maps: pages are shared with the file until written
+    return {name: np.load(entry / f"{name}.npy", mmap_mode="c") for name in meta["columns"]}
+
+
+def feature_matrix(feats: dict, cols) -> np.ndarray:
+    """(rows, len(cols)) float32 model input."""
+    return np.column_stack([feats[c] for c in cols]).astype(np.float32)
+
+
+if __name__ == "__main__":
+    import sys, time, tempfile
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else DATA_PATH
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - t0
+
+    def touch(feats):                             # force every page in
+        return sum(float(np.asarray(a).sum()) for a in feats.values())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, t_csv = timed(lambda: touch(derive(src)))
+        _, t_cold = timed(lambda: touch(load_features(src, tmp)))
+        _, t_warm = timed(lambda: touch(load_features(src, tmp)))
+    print(f"{src.name}: parse CSV {t_csv * 1e3:.1f} ms   cold (parse + write) {t_cold * 1e3:.1f} ms   "
+          f"warm (mmap) {t_warm * 1e3:.1f} ms   ×{t_csv / t_warm:.0f}")
@@ -0,0 +1,184 @@
+"""Exactly-once key allocation for outgoing alerts.
+
+Vault keys are handed out strictly in vault order.  Before a key is returned
+its id is appended to ``keys/consumed.ledger`` (write-ahead, optionally
+fsync'd) under an inter-process lock, so a key is never used twice even
+across monitor restarts or several monitors sharing one vault.
+
+    ledger entry = KEY_ID(u64) | KIND(u32) | COUNTER(u32)
+
+The next key is the vault record after the ledger's last entry.  The
+allocator remembers where it left off, so in the common case allocation is
+one ledger append and one mmap read — O(1) no matter how many keys exist.
+
+With ``subkeys_per_key=N`` every QKD key becomes a master for N alerts: each
+alert gets the HKDF subkey for the next counter (0 … N-1), the counter is
+carried in the packet header, and only then is the next master consumed.
+Key material then lasts N times as long as in one-key-per-alert mode.
+
+When the pool is empty the configured policy applies:
+
+* ``wait``   – poll for a fresh key until ``deadline`` seconds have passed
+* ``queue``  – fail immediately; the caller keeps the alert and retries later
+* ``derive`` – use an HKDF subkey of the last allocated key (see packet.py),
+               at most ``max_derived`` per master key
+"""
+import os
+import time
+import struct
+from pathlib import Path
+from collections import namedtuple
+from key_vault import KeyVault, KEY_DIR, VAULT_PATH, file_lock
+
+LEDGER_PATH = KEY_DIR / "consumed.ledger"
+ENTRY       = struct.Struct(">QII")
+DIRECT, DERIVED = 0, 1
+POLICIES    = ("wait", "queue", "derive")
+
+Lease = namedtuple("Lease", "key_id key counter")
+
+
+class KeyStarvedError(RuntimeError):
+    pass
+
+
+def read_tail(f):
+    """Last complete ledger entry of the open file *f*, or ``None``."""
+    size = f.seek(0, os.SEEK_END)
+    size -= size % ENTRY.size              # ignore a torn trailing write
+    if not size:
+        return None
+    f.seek(size - ENTRY.size)
+    return ENTRY.unpack(f.read(ENTRY.size))
+
+
+def pending_keys(vault: KeyVault, ledger_path=LEDGER_PATH) -> int:
+    """Number of committed vault keys not yet handed out."""
+    n = vault.refresh()
+    if not os.path.exists(ledger_path):
+        return n
+    with open(ledger_path, "rb") as f:
+        tail = read_tail(f)
+    if tail is None:
+        return n
+    try:
+        return n - vault.index_of(tail[0]) - 1
+    except KeyError:                       # ledger is ahead of this key source
+        return 0
+
+
+class KeyAllocator:
+    def __init__(self, vault=None, ledger_path=LEDGER_PATH, policy="wait",
+                 deadline=5.0, max_derived=1024, durable=True, poll=0.01, subkeys_per_key=0):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown key policy {policy!r}, expected one of {POLICIES}")
+        if not 0 <= subkeys_per_key <= 2 ** 32:
+            raise ValueError("subkeys_per_key must fit the 32-bit header counter")
+        self.vault       = vault if vault is not None else KeyVault(VAULT_PATH, create=True)
+        self.ledger_path = Path(ledger_path)
+        self.policy      = policy
+        self.deadline    = deadline
+        self.max_derived = max_derived
+        self.durable     = durable
+        self.poll        = poll
+        self.subkeys     = subkeys_per_key
+        self._lock_path  = self.ledger_path.with_name(self.ledger_path.name + ".lock")
+        self._tail       = None     # last ledger entry written by *this* allocator
+        self._next       = 0        # vault index following self._tail
+        self.stats = {"allocated": 0, "derived": 0, "starved": 0, "timeouts": 0,
+                      "wait_s": 0.0, "max_wait_s": 0.0}
+
+    # ─── ledger ─────────────────────────────────────────────────────────────
+    def _next_index(self, tail):
+        if tail is None:
+            return 0
+        if tail == self._tail:
+            return self._next
+        return self.vault.index_of(tail[0]) + 1      # another process moved on
+
+    def _skip_purged(self, i):
+        # records expired by the compactor are never handed out
+        n = len(self.vault) if i < len(self.vault) else self.vault.refresh()
+        while i < n and self.vault.is_purged(i):
+            i += 1
+        return i
+
+    def _take(self, derive):
+        with file_lock(self._lock_path), open(self.ledger_path, "a+b") as f:
+            tail = read_tail(f)
+            try:
+                nxt = self._next_index(tail)
+            except KeyError:
+                # the ledger names a key this source has not seen yet (e.g. a key
+                # bus subscriber still replaying): not ready, same as starved
+                return None
+            if self.subkeys and tail is not None and tail[1] == DERIVED \
+                    and tail[2] + 1 < self.subkeys:
+                entry = (tail[0], DERIVED, tail[2] + 1)
+                lease = Lease(tail[0], self.vault.get(tail[0]), tail[2] + 1)
+            elif self._skip_purged(nxt) < len(self.vault):
+                nxt = self._skip_purged(nxt)
+                key_id, key = self.vault.record_at(nxt)
+                if self.subkeys:
+                    entry, lease = (key_id, DERIVED, 0), Lease(key_id, key, 0)
+                else:
+                    entry, lease = (key_id, DIRECT, 0), Lease(key_id, key, None)
+                nxt += 1
+            elif derive and tail is not None:
+                counter = 0 if tail[1] == DIRECT else tail[2] + 1
+                if counter >= self.max_derived:
+                    return None
+                entry = (tail[0], DERIVED, counter)
+                lease = Lease(tail[0], self.vault.get(tail[0]), counter)
+            else:
+                return None
+            end = f.seek(0, os.SEEK_END)
+            if end % ENTRY.size:
+                f.truncate(end - end % ENTRY.size)
+            f.write(ENTRY.pack(*entry))
+            f.flush()
+            if self.durable:
+                os.fsync(f.fileno())
+            self._tail, self._next = entry, nxt
+        return lease
+
+    # ─── public API ─────────────────────────────────────────────────────────
+    def allocate(self) -> Lease:
+        """Return a key that has never been handed out before."""
+        lease = self._take(derive=False)
+        if lease is None:
+            self.stats["starved"] += 1
+            lease = self._starved()
+        self.stats["allocated"] += 1
+        if lease.counter is not None:
+            self.stats["derived"] += 1
+        return lease
+
+    def _starved(self) -> Lease:
+        if self.policy == "queue":
+            raise KeyStarvedError("no fresh QKD key available")
+        if self.policy == "derive":
+            lease = self._take(derive=True)
+            if lease is None:
+                raise KeyStarvedError(f"no fresh QKD key to use or derive from "
+                                      f"(cap {self.max_derived} subkeys per key)")
+            return lease
+
+        t0 = time.monotonic()
+        while True:
+            time.sleep(self.poll)
+            lease = self._take(derive=False)
+            waited = time.monotonic() - t0
+            if lease is not None or waited >= self.deadline:
+                self.stats["wait_s"] += waited
+                self.stats["max_wait_s"] = max(self.stats["max_wait_s"], waited)
+                if lease is not None:
+                    return lease
+                self.stats["timeouts"] += 1
+                raise KeyStarvedError(f"no fresh QKD key within {self.deadline:g}s")
+
+    def available(self) -> int:
+        return pending_keys(self.vault, self.ledger_path)
+
+    def metrics(self) -> dict:
+        return {**self.stats, "available": self.available(), "policy": self.policy}
@@ -0,0 +1,103 @@
+"""Cold-key archive: legacy key files packed into vault-format segments.
+
+    keys/archive/seg-000001.qkv   # KeyVault file, ids strictly increasing
+    keys/archive/index.json       # [{"segment", "first", "last", "count"}, …]
+
+A lookup bisects the index on ``first`` and then the segment's own id index,
+so finding an archived key costs two binary searches and one mmap read.
+"""
+import os
+import json
+import heapq
+from bisect import bisect_right
+from pathlib import Path
+from key_vault import KeyVault, KEY_DIR
+
+ARCHIVE_DIR  = KEY_DIR / "archive"
+SEGMENT_SIZE = 4096         # keys per segment file
+
+
+class KeyArchive:
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path      = Path(path)
+        self._segments = {}
+        self._mtime    = None
+        self.index     = []
+        self._load_index()
+
+    def _index_path(self):
+        return self.path / "index.json"
+
+    def _load_index(self):
+        try:
+            mtime = self._index_path().stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self.index  = json.loads(self._index_path().read_text())
+
+    def _write_index(self):
+        tmp = self._index_path().with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.index, indent=1))
+        os.replace(tmp, self._index_path())
+        self._mtime = self._index_path().stat().st_mtime_ns
+
+    def _segment(self, name, create=False):
+        seg = self._segments.get(name)
+        if seg is None:
+            seg = self._segments[name] = KeyVault(self.path / name, create=create)
+        return seg
+
+    def get(self, key_id: int) -> bytes:
+        self._load_index()
+        # segments are sorted by first id; ranges only overlap if an older
+        # key file turned up after a newer one was archived
+        for i in range(bisect_right([s["first"] for s in self.index], key_id) - 1, -1, -1):
+            seg = self.index[i]
+            if key_id <= seg["last"] and key_id in self._segment(seg["segment"]):
+                return self._segment(seg["segment"]).get(key_id)
+        raise KeyError(key_id)
+
+    def __contains__(self, key_id):
+        try:
+            self.get(key_id)
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self):
+        self._load_index()
+        return sum(s["count"] for s in self.index)
+
+    def pack(self, records):
+        """Append ``(key_id, key)`` pairs, opening new segments as needed."""
+        records = sorted(records)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+        while records:
+            cur = max(self.index, key=lambda s: s["segment"]) if self.index else None
+            if cur is None or cur["count"] >= SEGMENT_SIZE or records[0][0] <= cur["last"]:
+                cur = {"segment": f"seg-{len(self.index) + 1:06d}.qkv",
+                       "first": records[0][0], "last": records[0][0], "count": 0}
+                self.index.append(cur)
+                self.index.sort(key=lambda s: s["first"])
+            take = records[:SEGMENT_SIZE - cur["count"]]
+            records = records[len(take):]
+            self._segment(cur["segment"], create=True).extend(take)
+            cur["last"]   = take[-1][0]
+            cur["count"] += len(take)
+            self._write_index()
+
+    def ids(self):
+        self._load_index()
+        for s in self.index:
+            yield from self._segment(s["segment"]).ids()
+
+    def newest_first(self):
+        """``(key_id, key)`` pairs across all segments, highest id first (lazy)."""
+        self._load_index()
+        segs = [self._segment(s["segment"]) for s in self.index]
+        for seg in segs:
+            seg.refresh()
+        return heapq.merge(*(seg.newest_first() for seg in segs), key=lambda r: -r[0])
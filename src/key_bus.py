@@ -0,0 +1,223 @@
+"""Push-based key distribution over a Unix-domain socket.
+
+The producer runs a ``KeyPublisher`` next to its vault; monitors and listeners
+run a ``KeySubscriber`` that keeps every key in memory.  A key's sequence
+number is its index in the vault, so a subscriber that reconnects simply asks
+for everything from the first sequence number it has not seen yet.
+
+    subscribe = b"SUB1" | FROM_SEQ(u64)
+    welcome   = b"KEYS" | COMMITTED(u64)          # replay target
+    frame     = SEQ(u64) | KEY_ID(u64) | KEY(32)  # repeated, in seq order
+                                                  # (all-zero KEY: purged)
+
+``KeySubscriber`` offers the read side of ``KeyVault`` (``refresh``,
+``record_at``, ``index_of``, ``get``, ``latest`` …) so it can stand in for the
+vault in ``KeyAllocator`` and ``KeyStore``.
+"""
+import socket
+import struct
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from key_vault import KeyVault, KEY_DIR
+
+BUS_PATH  = KEY_DIR / "keybus.sock"
+SUBSCRIBE = struct.Struct(">4sQ")
+WELCOME   = struct.Struct(">4sQ")
+FRAME     = struct.Struct(">QQ32s")
+PURGED    = bytes(32)
+
+
+def _require_unix_sockets():
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("key bus needs Unix-domain sockets, not available on this platform")
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("key bus closed")
+        buf += chunk
+    return bytes(buf)
+
+
+class KeyPublisher:
+    """Streams the vault to subscribers; call ``notify()`` after each append."""
+
+    def __init__(self, vault_path, path=BUS_PATH):
+        _require_unix_sockets()
+        self.path    = Path(path)
+        self.vault   = KeyVault(vault_path)
+        self._lock   = threading.Lock()
+        self._cond   = threading.Condition()
+        self._closed = False
+        self.clients = 0
+        if self.path.exists():
+            self.path.unlink()
+        self._srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._srv.bind(str(self.path))
+        self._srv.listen()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _records(self, start):
+        # purged records go out with an all-zero key so sequence numbers stay dense
+        with self._lock:
+            n = self.vault.refresh()
+            ids = self.vault.ids()
+            return n, [(ids[i], PURGED) if self.vault.is_purged(i) else self.vault.record_at(i)
+                       for i in range(start, n)]
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self._srv.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        self.clients += 1
+        try:
+            magic, seq = SUBSCRIBE.unpack(_recv_exact(conn, SUBSCRIBE.size))
+            if magic != b"SUB1":
+                return
+            with self._lock:
+                committed = self.vault.refresh()
+            conn.sendall(WELCOME.pack(b"KEYS", committed))
+            while not self._closed:
+                n, records = self._records(seq)
+                if records:
+                    conn.sendall(b"".join(FRAME.pack(seq + i, kid, key)
+                                          for i, (kid, key) in enumerate(records)))
+                    seq = n
+                with self._cond:
+                    with self._lock:
+                        idle = self.vault.refresh() <= seq
+                    if idle and not self._closed:
+                        self._cond.wait(1.0)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.clients -= 1
+            conn.close()
+
+    def notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def close(self):
+        self._closed = True
+        self.notify()
+        self._srv.close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+class KeySubscriber:
+    """In-memory key table fed by a ``KeyPublisher``; reconnects on its own."""
+
+    def __init__(self, path=BUS_PATH, retry=1.0):
+        _require_unix_sockets()
+        self.path     = Path(path)
+        self.retry    = retry
+        self._ids     = []
+        self._keys    = []
+        self._by_id   = {}
+        self._target  = None
+        self._cond    = threading.Condition()
+        self._closed  = False
+        self._sock    = None
+        self.reconnects = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while not self._closed:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                    self._sock = s
+                    s.connect(str(self.path))
+                    s.sendall(SUBSCRIBE.pack(b"SUB1", len(self._ids)))
+                    magic, committed = WELCOME.unpack(_recv_exact(s, WELCOME.size))
+                    if magic != b"KEYS":
+                        raise ConnectionError("not a key bus")
+                    with self._cond:
+                        self._target = committed
+                        self._cond.notify_all()
+                    while not self._closed:
+                        seq, key_id, key = FRAME.unpack(_recv_exact(s, FRAME.size))
+                        with self._cond:
+                            if seq == len(self._ids):
+                                self._ids.append(key_id)
+                                self._keys.append(key)
+                                if key != PURGED:
+                                    self._by_id[key_id] = key
+                                self._cond.notify_all()
+            except (ConnectionError, OSError):
+                if self._closed:
+                    return
+                self.reconnects += 1
+                with self._cond:
+                    self._cond.wait(self.retry)
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Block until the initial replay has caught up with the producer."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._target is not None and len(self._ids) >= self._target, timeout)
+
+    def wait_for(self, n, timeout=None) -> bool:
+        """Block until at least *n* keys are known."""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._ids) >= n, timeout)
+
+    # ─── KeyVault read interface ────────────────────────────────────────────
+    def refresh(self) -> int:
+        return len(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def record_at(self, i):
+        if self._keys[i] == PURGED:
+            raise KeyError(f"key {self._ids[i]} has been purged")
+        return self._ids[i], self._keys[i]
+
+    def is_purged(self, i):
+        return self._keys[i] == PURGED
+
+    def index_of(self, key_id):
+        i = bisect_left(self._ids, key_id)
+        if i == len(self._ids) or self._ids[i] != key_id:
+            raise KeyError(key_id)
+        return i
+
+    def get(self, key_id):
+        return self._by_id[key_id]
+
+    def __contains__(self, key_id):
+        return key_id in self._by_id
+
+    def latest(self):
+        if not self._ids:
+            raise FileNotFoundError("No QKD keys found")
+        return self.record_at(-1)
+
+    def ids(self):
+        return self._ids
+
+    def newest_first(self):
+        for i in range(len(self._ids) - 1, -1, -1):
+            if not self.is_purged(i):
+                yield self.record_at(i)
+
+    def close(self):
+        self._closed = True
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        with self._cond:
+            self._cond.notify_all()
@@ -0,0 +1,76 @@
+"""Bounded in-memory key cache.
+
+Entries are evicted least-recently-used once ``maxsize`` is reached and,
+with ``ttl``, after that many seconds.  ``stamp()`` returns a cheap change
+token for the backing store (directory mtime, vault length, …); it is polled
+at most every ``check_every`` seconds.  On a change, ``stale(old, new)``
+names the key ids that may have changed and only those are dropped; without
+it, or when it returns None, the whole cache goes.  Purged or replaced keys
+are thus never served stale.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+class KeyCache:
+    def __init__(self, loader, maxsize=4096, ttl=None, stamp=None, check_every=0.5, stale=None):
+        self.loader      = loader
+        self.maxsize     = maxsize
+        self.ttl         = ttl
+        self.stamp       = stamp
+        self.stale       = stale
+        self.check_every = check_every
+        self._data       = OrderedDict()      # key_id -> (key, loaded_at)
+        self._lock       = threading.RLock()
+        self._last_stamp = stamp() if stamp else None
+        self._checked    = time.monotonic()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _check_stamp(self, now):
+        if self.stamp is None or now - self._checked < self.check_every:
+            return
+        self._checked = now
+        token = self.stamp()
+        if token != self._last_stamp:
+            old, self._last_stamp = self._last_stamp, token
+            ids = self.stale(old, token) if self.stale else None
+            if ids is None:
+                self.invalidate()
+            else:
+                for key_id in ids:
+                    self.invalidate(key_id)
+
+    def get(self, key_id):
+        now = time.monotonic()
+        with self._lock:
+            self._check_stamp(now)
+            hit = self._data.get(key_id)
+            if hit is not None and (self.ttl is None or now - hit[1] < self.ttl):
+                self._data.move_to_end(key_id)
+                self.hits += 1
+                return hit[0]
+            self.misses += 1
+        key = self.loader(key_id)
+        with self._lock:
+            self._data[key_id] = (key, now)
+            self._data.move_to_end(key_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return key
+
+    def invalidate(self, key_id=None):
+        with self._lock:
+            if key_id is None:
+                self._data.clear()
+            elif self._data.pop(key_id, None) is None:
+                return
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions, "invalidations": self.invalidations,
+                "size": len(self._data)}
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Key retirement ledger and background compactor.
+
+Each pass:
+  * vault keys the allocator has handed out are recorded as CONSUMED in
+    ``keys/retired.ledger``; once ``--grace`` seconds have passed (so the
+    listener can still open late alerts) their material is purged in place
+  * unused vault keys older than ``--max-age`` are recorded as EXPIRED and
+    purged, so the allocator never hands them out
+  * ``keys/*.bin`` files already present in the vault are securely deleted
+  * other key files older than ``--cold-age`` are packed into archive
+    segments (see key_archive.py) and then securely deleted
+
+and prints the size of ``keys/`` and the time of the directory scan the
+consumers used to do, before and after.
+
+    retired entry = KEY_ID(u64) | STATE(u32) | UNIX_TIME(u32)
+
+"Secure" deletion overwrites the file with zeros and fsyncs before
+unlinking; on copy-on-write filesystems or SSDs that is best effort only.
+
+Usage:  python src/key_compactor.py [--once] [--interval S] [--grace S]
+                                    [--cold-age S] [--max-age S]
+"""
+import os
+import time
+import struct
+import argparse
+from pathlib import Path
+from key_vault import KeyVault, KEY_DIR, VAULT_PATH
+from key_archive import KeyArchive, ARCHIVE_DIR
+from key_allocator import LEDGER_PATH, read_tail
+
+RETIRED_PATH = KEY_DIR / "retired.ledger"
+RETIRED      = struct.Struct(">QII")
+CONSUMED, EXPIRED, PURGED = 1, 2, 3
+
+
+class RetiredLedger:
+    """Append-only record of what happened to every retired key."""
+
+    def __init__(self, path=RETIRED_PATH):
+        self.path  = Path(path)
+        self.state = {}                         # key_id -> (state, unix time)
+        if self.path.exists():
+            data = self.path.read_bytes()
+            for off in range(0, len(data) - len(data) % RETIRED.size, RETIRED.size):
+                kid, st, t = RETIRED.unpack_from(data, off)
+                self.state[kid] = (st, t)
+
+    def record(self, entries):
+        if not entries:
+            return
+        with open(self.path, "ab") as f:
+            f.write(b"".join(RETIRED.pack(kid, st, t) for kid, st, t in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        for kid, st, t in entries:
+            self.state[kid] = (st, t)
+
+
+def secure_delete(path: Path):
+    size = path.stat().st_size
+    with open(path, "r+b") as f:
+        f.write(bytes(size))
+        f.flush()
+        os.fsync(f.fileno())
+    path.unlink()
+
+
+def scan_stats(key_dir: Path):
+    t0 = time.perf_counter()
+    files = sorted(key_dir.glob("*.bin"))
+    scan_ms = (time.perf_counter() - t0) * 1e3
+    size = sum(p.stat().st_size for p in key_dir.rglob("*") if p.is_file())
+    return {"files": len(files), "bytes": size, "scan_ms": scan_ms}
+
+
+class Compactor:
+    def __init__(self, key_dir=KEY_DIR, grace=3600.0, cold_age=86400.0, max_age=0.0):
+        self.key_dir  = Path(key_dir)
+        self.grace    = grace
+        self.cold_age = cold_age
+        self.max_age  = max_age
+        self.retired  = RetiredLedger(self.key_dir / RETIRED_PATH.name)
+        self.archive  = KeyArchive(self.key_dir / ARCHIVE_DIR.name)
+        self.vault    = None
+        self._first_live = 0                    # vault records below this are purged
+
+    def _active_index(self):
+        """Vault index of the allocator's current key (never purged), or -1."""
+        ledger = self.key_dir / LEDGER_PATH.name
+        if not ledger.exists():
+            return -1
+        with open(ledger, "rb") as f:
+            tail = read_tail(f)
+        return -1 if tail is None else self.vault.index_of(tail[0])
+
+    def _compact_vault(self, now):
+        vault, ids = self.vault, self.vault.ids()
+        vault.refresh()
+        active, events, purge = self._active_index(), [], []
+
+        for i in range(self._first_live, active):
+            if vault.is_purged(i):
+                continue
+            st = self.retired.state.get(ids[i])
+            if st is None:
+                events.append((ids[i], CONSUMED, int(now)))
+            elif now - st[1] >= self.grace:
+                purge.append(i)
+                events.append((ids[i], PURGED, int(now)))
+
+        expired = 0
+        if self.max_age:
+            cutoff = time.time_ns() - int(self.max_age * 1e9)
+            for i in range(active + 1, len(vault)):
+                if vault.created_ns(i) >= cutoff:
+                    break
+                if not vault.is_purged(i):
+                    purge.append(i)
+                    events += [(ids[i], EXPIRED, int(now)), (ids[i], PURGED, int(now))]
+                    expired += 1
+
+        self.retired.record(events)             # ledger first, then destroy
+        vault.purge(purge)
+        while self._first_live < active and vault.is_purged(self._first_live):
+            self._first_live += 1
+        return len(purge) - expired, expired
+
+    def _compact_files(self, now):
+        removed, cold = 0, []
+        for p in self.key_dir.glob("*.bin"):
+            if not p.stem.isdigit():
+                continue
+            kid = int(p.stem)
+            if self.vault is not None and kid in self.vault:
+                secure_delete(p)
+                removed += 1
+            elif now - p.stat().st_mtime >= self.cold_age:
+                cold.append((kid, p))
+        if cold:
+            self.archive.pack((kid, p.read_bytes()) for kid, p in cold)
+            for kid, p in cold:
+                if self.archive.get(kid) == p.read_bytes():
+                    secure_delete(p)
+        return removed, len(cold)
+
+    def run_once(self):
+        now = time.time()
+        before = scan_stats(self.key_dir)
+        vault_path = self.key_dir / VAULT_PATH.name
+        if self.vault is None and vault_path.exists():
+            self.vault = KeyVault(vault_path)
+        purged = expired = 0
+        if self.vault is not None:
+            purged, expired = self._compact_vault(now)
+        removed, archived = self._compact_files(now)
+        after = scan_stats(self.key_dir)
+        print(f"[compactor] keys/: {before['files']:,} files, {before['bytes'] / 1e3:,.1f} kB, "
+              f"scan {before['scan_ms']:.2f} ms → {after['files']:,} files, "
+              f"{after['bytes'] / 1e3:,.1f} kB, scan {after['scan_ms']:.2f} ms")
+        print(f"[compactor] purged {purged} consumed, expired {expired}, "
+              f"removed {removed} migrated files, archived {archived} cold files")
+        return {"before": before, "after": after, "purged": purged, "expired": expired,
+                "removed": removed, "archived": archived}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--keys", type=Path, default=KEY_DIR)
+    ap.add_argument("--once", action="store_true", help="run a single pass and exit")
+    ap.add_argument("--interval", type=float, default=600.0, help="seconds between passes")
+    ap.add_argument("--grace", type=float, default=3600.0,
+                    help="seconds a consumed key is kept for late decryption")
+    ap.add_argument("--cold-age", type=float, default=86400.0,
+                    help="age after which unused key files are archived")
+    ap.add_argument("--max-age", type=float, default=0.0,
+                    help="age after which unused vault keys expire (0 = never)")
+    args = ap.parse_args()
+
+    compactor = Compactor(args.keys, args.grace, args.cold_age, args.max_age)
+    while True:
+        compactor.run_once()
+        if args.once:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""Append-only, memory-mapped QKD key vault.
+
+    file   = header(64) | record(64) * n
+    header = MAGIC(4) | RECORD_SIZE(u32) | COMMITTED(u64) | PURGES(u64) | padding
+    record = KEY_ID(u64) | CREATED_NS(u64) | FLAGS(u32) | CRC32(u32) | KEY(32) | padding
+
+Append protocol (any number of writers, any number of readers):
+  1. take the exclusive lock on ``<vault>.lock``
+  2. write the new records after the last committed one and flush/fsync
+  3. bump COMMITTED in the header and flush
+Readers only ever look at the first COMMITTED records, so a record becomes
+visible all at once or not at all.  Retired keys are destroyed in place by
+``purge()``: FLAGS gets FLAG_PURGED and the key bytes are zeroed, so record
+offsets (and every reader's index) stay valid; PURGES counts purge calls so
+readers caching keys can tell that some went away.  Key ids are strictly increasing, which
+makes the id→offset index a sorted ``array('Q')`` searched with bisect.
+
+Usage:  python src/key_vault.py migrate [--keys DIR] [--vault FILE] [--remove]
+"""
+import os
+import mmap
+import time
+import zlib
+import struct
+import argparse
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import fcntl
+
+    def _lock(f):   fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    def _unlock(f): fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+except ImportError:                               # Windows
+    import msvcrt
+
+    def _lock(f):   f.seek(0); msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    def _unlock(f): f.seek(0); msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive inter-process lock held on the file at *path*."""
+    with open(path, "a+b") as lk:
+        _lock(lk)
+        try:
+            yield
+        finally:
+            _unlock(lk)
+
+# ─── Configuration ──────────────────────────────────────────────────────────
+ROOT       = Path(__file__).resolve().parents[1]
+KEY_DIR    = ROOT / "keys"
+VAULT_PATH = KEY_DIR / "vault.qkv"
+# ─────────────────────────────────────────────────────────────────────────────
+
+MAGIC   = b"QKV1"
+HEADER  = struct.Struct(">4sIQ")
+PURGES  = struct.Struct(">Q")           # right after HEADER; 0 in vaults that predate it
+RECORD  = struct.Struct(">QQII32s")
+HDR_LEN = 64
+REC_LEN = 64
+KEY_LEN = 32
+FLAGS_OFF = 16
+KEY_OFF   = 24
+
+FLAG_PURGED = 0x01
+
+
+class VaultError(Exception):
+    pass
+
+
+def new_key_id(last=None) -> int:
+    """Monotonic 64-bit key id: epoch microseconds, strictly above *last*."""
+    return max(time.time_ns() // 1000, (last or 0) + 1)
+
+
+class KeyVault:
+    def __init__(self, path=VAULT_PATH, create=False, fsync=True):
+        self.path  = Path(path)
+        self.fsync = fsync
+        if not self.path.exists():
+            if not create:
+                raise FileNotFoundError(f"Key vault not found: {self.path}")
+            self._init_file()
+        self._fh   = open(self.path, "rb", buffering=0)
+        self._mm   = None
+        self._ids  = array("Q")
+        self._n    = 0
+        self._check_header()
+        self.refresh()
+
+    def _init_file(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self._lock_path()):
+            if not self.path.exists():
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_bytes(HEADER.pack(MAGIC, REC_LEN, 0).ljust(HDR_LEN, b"\0"))
+                os.replace(tmp, self.path)
+
+    def _lock_path(self):
+        return self.path.with_name(self.path.name + ".lock")
+
+    def _check_header(self):
+        magic, rec_len, _ = HEADER.unpack(self._fh.read(HEADER.size))
+        if magic != MAGIC or rec_len != REC_LEN:
+            raise VaultError(f"{self.path} is not a v1 key vault")
+
+    # ─── reading ────────────────────────────────────────────────────────────
+    def _committed(self):
+        if self._mm is not None:
+            return HEADER.unpack_from(self._mm)[2]
+        self._fh.seek(0)
+        return HEADER.unpack(self._fh.read(HEADER.size))[2]
+
+    def purges(self) -> int:
+        """Purge generation: bumped by every ``purge()`` that destroyed keys."""
+        if self._mm is not None:
+            return PURGES.unpack_from(self._mm, HEADER.size)[0]
+        self._fh.seek(HEADER.size)
+        return PURGES.unpack(self._fh.read(PURGES.size))[0]
+
+    def refresh(self) -> int:
+        """Pick up records committed by other processes; returns the count."""
+        n = self._committed()
+        if n == self._n:
+            return n
+        need = HDR_LEN + n * REC_LEN
+        if self._mm is None or len(self._mm) < need:
+            if self._mm is not None:
+                self._mm.close()
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        for i in range(self._n, n):
+            self._ids.append(struct.unpack_from(">Q", self._mm, HDR_LEN + i * REC_LEN)[0])
+        self._n = n
+        return n
+
+    def __len__(self):
+        return self._n
+
+    def _record(self, i):
+        key_id, created, flags, crc, key = RECORD.unpack_from(self._mm, HDR_LEN + i * REC_LEN)
+        if zlib.crc32(key, zlib.crc32(struct.pack(">QQ", key_id, created))) != crc:
+            if not flags & FLAG_PURGED and not self.is_purged(i):
+                raise VaultError(f"corrupt record #{i} (key id {key_id})")
+            flags = FLAG_PURGED                 # purged while we were reading
+        if flags & FLAG_PURGED:
+            raise KeyError(f"key {key_id} has been purged")
+        return key_id, key
+
+    def is_purged(self, i: int) -> bool:
+        return bool(struct.unpack_from(">I", self._mm, HDR_LEN + i * REC_LEN + FLAGS_OFF)[0]
+                    & FLAG_PURGED)
+
+    def created_ns(self, i: int) -> int:
+        return struct.unpack_from(">Q", self._mm, HDR_LEN + i * REC_LEN + 8)[0]
+
+    def record_at(self, i: int):
+        """``(key_id, key)`` of the i-th committed record (negative ok)."""
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return self._record(i)
+
+    def index_of(self, key_id: int) -> int:
+        i = bisect_left(self._ids, key_id)
+        if i == self._n or self._ids[i] != key_id:
+            self.refresh()
+            i = bisect_left(self._ids, key_id)
+            if i == self._n or self._ids[i] != key_id:
+                raise KeyError(key_id)
+        return i
+
+    def get(self, key_id: int) -> bytes:
+        return self._record(self.index_of(key_id))[1]
+
+    def __contains__(self, key_id):
+        try:
+            self.index_of(key_id)
+            return True
+        except KeyError:
+            return False
+
+    def latest(self):
+        self.refresh()
+        if not self._n:
+            raise FileNotFoundError("No QKD keys found")
+        return self._record(self._n - 1)
+
+    def ids(self):
+        return self._ids
+
+    def newest_first(self):
+        for i in range(self._n - 1, -1, -1):
+            if not self.is_purged(i):
+                yield self._record(i)
+
+    # ─── writing ────────────────────────────────────────────────────────────
+    def extend(self, records):
+        """Atomically append ``(key_id, key)`` pairs; ids must keep increasing."""
+        records = list(records)
+        if records:
+            self._commit(lambda last: records)
+
+    def append(self, key_id: int, key: bytes):
+        self.extend([(key_id, key)])
+
+    def add(self, keys):
+        """Atomically append *keys* under freshly assigned ids; returns the ids.
+
+        Ids are microseconds since the epoch, bumped past the last committed
+        id, and chosen while holding the writer lock, so they are unique and
+        monotonic across every process writing to the vault.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        out = []
+        def assign(last):
+            out.clear()
+            kid = new_key_id(last)
+            for key in keys:
+                out.append((kid, key))
+                kid += 1
+            return out
+        self._commit(assign)
+        return [kid for kid, _ in out]
+
+    def _commit(self, make_records):
+        now = time.time_ns()
+        with file_lock(self._lock_path()), open(self.path, "r+b") as f:
+            n = HEADER.unpack(f.read(HEADER.size))[2]
+            last = None
+            if n:
+                f.seek(HDR_LEN + (n - 1) * REC_LEN)
+                last = struct.unpack(">Q", f.read(8))[0]
+            records = make_records(last)
+            buf = bytearray()
+            for key_id, key in records:
+                if len(key) != KEY_LEN:
+                    raise ValueError(f"key {key_id} is {len(key)} bytes, expected {KEY_LEN}")
+                if last is not None and key_id <= last:
+                    raise ValueError(f"key id {key_id} is not greater than {last}")
+                crc = zlib.crc32(key, zlib.crc32(struct.pack(">QQ", key_id, now)))
+                buf += RECORD.pack(key_id, now, 0, crc, key).ljust(REC_LEN, b"\0")
+                last = key_id
+            f.seek(HDR_LEN + n * REC_LEN)
+            f.write(buf)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, REC_LEN, n + len(records)))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.refresh()
+
+    def purge(self, indices):
+        """Destroy the key material of the given records in place."""
+        indices = sorted(set(indices))
+        if not indices:
+            return
+        with file_lock(self._lock_path()), open(self.path, "r+b") as f:
+            for i in indices:
+                if not 0 <= i < self._n:
+                    raise IndexError(i)
+                off = HDR_LEN + i * REC_LEN
+                f.seek(off + FLAGS_OFF)
+                flags = struct.unpack(">I", f.read(4))[0]
+                f.seek(off + FLAGS_OFF)
+                f.write(struct.pack(">I", flags | FLAG_PURGED))
+                f.flush()                       # flag first, so readers never see a
+                f.seek(off + KEY_OFF)           # zeroed key that looks valid
+                f.write(bytes(KEY_LEN))
+            f.flush()
+            f.seek(HEADER.size)
+            gen = PURGES.unpack(f.read(PURGES.size))[0]
+            f.seek(HEADER.size)
+            f.write(PURGES.pack(gen + 1))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def migrate(key_dir=KEY_DIR, vault_path=VAULT_PATH, remove=False):
+    """Import ``<key_dir>/<id>.bin`` files into the vault (idempotent).
+
+    With ``remove`` the files are deleted once their key reads back intact.
+    """
+    vault = KeyVault(vault_path, create=True)
+    last  = vault.record_at(-1)[0] if len(vault) else -1
+    files = sorted((int(p.stem), p) for p in Path(key_dir).glob("*.bin") if p.stem.isdigit())
+    todo  = [(kid, p.read_bytes()) for kid, p in files if kid > last]
+    vault.extend(todo)
+    print(f"✓ imported {len(todo)} keys ({len(files) - len(todo)} already present) → {vault.path}")
+    if remove:
+        removed = 0
+        for kid, p in files:
+            if kid in vault and vault.get(kid) == p.read_bytes():
+                p.unlink()
+                removed += 1
+        print(f"✓ removed {removed} migrated key files")
+    vault.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    mg = sub.add_parser("migrate", help="import keys/*.bin into the vault")
+    mg.add_argument("--keys", type=Path, default=KEY_DIR)
+    mg.add_argument("--vault", type=Path, default=VAULT_PATH)
+    mg.add_argument("--remove", action="store_true", help="delete files once imported")
+    args = ap.parse_args()
+    if args.cmd == "migrate":
+        migrate(args.keys, args.vault, args.remove)
@@ -0,0 +1,127 @@
+"""Key lookup shared by the monitor, listener and dashboard.
+
+Keys are resolved from the optional in-memory key bus feed first, then the
+memory-mapped vault, the cold-key archive, and legacy ``keys/<id>.bin`` files
+last, so trees that have not been migrated yet keep working unchanged.  With ``cache_size`` the
+resolved keys are kept in a ``KeyCache``.  A key file that is removed or
+replaced drops only that key; a purge inside the vault drops them all.
+"""
+import heapq
+from pathlib import Path
+from key_vault import KeyVault, KEY_DIR, VAULT_PATH
+from key_cache import KeyCache
+from key_archive import KeyArchive, ARCHIVE_DIR
+
+
+class KeyStore:
+    def __init__(self, key_dir=KEY_DIR, vault_path=None, feed=None, cache_size=0, cache_ttl=None):
+        self.key_dir    = Path(key_dir)
+        self.feed       = feed
+        self.vault_path = Path(vault_path) if vault_path else self.key_dir / VAULT_PATH.name
+        self.vault      = None
+        self.archive    = KeyArchive(self.key_dir / ARCHIVE_DIR.name)
+        self._open_vault()
+        self._seen  = self._scan() if cache_size else {}
+        self.cache  = KeyCache(self._load, cache_size, cache_ttl, self.stamp,
+                               stale=self._stale) if cache_size else None
+
+    def _open_vault(self):
+        if self.vault is None and self.vault_path.exists():
+            self.vault = KeyVault(self.vault_path)
+        return self.vault
+
+    def _files(self):
+        return sorted((int(p.stem), p) for p in self.key_dir.glob("*.bin") if p.stem.isdigit())
+
+    def _scan(self):
+        """``{key_id: (inode, size, mtime)}`` of the loose key files."""
+        seen = {}
+        for key_id, path in self._files():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            seen[key_id] = (st.st_ino, st.st_size, st.st_mtime_ns)
+        return seen
+
+    def stamp(self):
+        """Cheap change token for the cache: ``(key_dir mtime, vault purge generation)``.
+
+        Any file added, removed or replaced in ``keys/`` bumps the mtime, and
+        ``_stale`` then works out which cached keys that affects.
+        """
+        try:
+            mtime = self.key_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        vault = self._open_vault()
+        return mtime, vault.purges() if vault is not None else 0
+
+    def _stale(self, old, new):
+        """Key ids a stamp change may have altered; None drops the whole cache."""
+        if old is None or old[1] != new[1]:
+            return None                    # vault purged keys in place
+        seen, self._seen = self._seen, self._scan()
+        return [key_id for key_id, st in seen.items() if self._seen.get(key_id) != st]
+
+    def get(self, key_id: int) -> bytes:
+        if self.cache is not None:
+            return self.cache.get(key_id)
+        return self._load(key_id)
+
+    def _load(self, key_id: int) -> bytes:
+        if self.feed is not None and key_id in self.feed:
+            return self.feed.get(key_id)
+        vault = self._open_vault()
+        if vault is not None and key_id in vault:
+            return vault.get(key_id)
+        if key_id in self.archive:
+            return self.archive.get(key_id)
+        key_file = self.key_dir / f"{key_id}.bin"
+        if not key_file.exists():
+            raise FileNotFoundError(f"Key file not found: {key_file.name}")
+        return key_file.read_bytes()
+
+    def latest(self):
+        """``(key_id, key)`` of the newest key."""
+        if self.feed is not None and len(self.feed):
+            return self.feed.latest()
+        vault = self._open_vault()
+        if vault is not None and vault.refresh():
+            return vault.latest()
+        files = self._files()
+        if not files:
+            raise FileNotFoundError("No QKD keys found")
+        key_id, path = files[-1]
+        return key_id, path.read_bytes()
+
+    def legacy_keys(self):
+        """``(key_id, key)`` pairs newest first, for trial decryption.
+
+        Vault keys come first, then loose key files merged with the cold-key
+        archive, so legacy keys keep working after the compactor packs them.
+        """
+        vault = self._open_vault()
+        if vault is not None:
+            vault.refresh()
+            yield from vault.newest_first()
+        files = ((key_id, path) for key_id, path in reversed(self._files())
+                 if vault is None or key_id not in vault)
+        older = heapq.merge(((key_id, None) for key_id, _ in files),
+                            ((key_id, key) for key_id, key in self.archive.newest_first()
+                             if vault is None or key_id not in vault),
+                            key=lambda r: -r[0])
+        for key_id, key in older:
+            yield key_id, key if key is not None else self.get(key_id)
+
+    def ids(self):
+        ids = {kid for kid, _ in self._files()}
+        ids.update(self.archive.ids())
+        vault = self._open_vault()
+        if vault is not None:
+            vault.refresh()
+            ids.update(vault.ids())
+        return sorted(ids)
+
+    def __len__(self):
+        return len(self.ids())
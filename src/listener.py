@@ -1,60 +1,149 @@
 #!/usr/bin/env python3
+"""Decrypt alert packets, log them and store them in the alert store.
+
+By default reads ``enc_alert=<hex>`` lines from stdin (``monitor.py |
+listener.py``).  With ``--serve`` it accepts binary frames from any number of
+monitors over TCP, UDP or a Unix socket instead (see alert_server.py).
+
+Usage:  python src/monitor.py | python src/listener.py
+        python src/listener.py --serve tcp://0.0.0.0:9750
+"""
 import sys
 import json
+import asyncio
+import threading
 from pathlib import Path
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from itertools import islice
+from packet import open_packet, parse_header
+from keystore import KeyStore
+from key_bus import KeySubscriber
+from alert_store import AlertStore, ALERTS_DB
+from alert_server import AlertServer
+from ordered_pool import OrderedPool
 
 KEYS = Path(__file__).resolve().parents[1] / "keys"
 LOG_PATH = Path(__file__).resolve().parents[1] / "listener_output.log"
+LEGACY_SCAN = 64    # newest keys tried for headerless (pre-v1) packets
+KEY_BUS = None      # e.g. KEYS / "keybus.sock" to take keys from `qkd_producer.py --publish`
+KEY_CACHE_SIZE = 4096
+KEY_CACHE_TTL  = 3600.0  # seconds
+TRACE = True        # log every packet's hex, nonce and ciphertext
+WORKERS = 0         # decryption threads; 0 decrypts inline (fastest on one core, see bench_listener.py)
 
-# line-buffered file logging
-log_file = open(LOG_PATH, "w", buffering=1, encoding="utf-8")
-def log(msg):
-    print(msg)
-    print(msg, file=log_file)
 
-def load_key(key_name: str) -> bytes:
-    key_file = KEYS / key_name
-    if not key_file.exists():
-        raise FileNotFoundError(f"Key file not found: {key_name}")
-    return key_file.read_bytes()
+def decrypt(packet: bytes, load_key, legacy_keys=()):
+    """Decrypt and validate one packet: ``(alert, key_id, subkey)``; raises on failure."""
+    hdr = parse_header(packet)
+    pt, key_id = open_packet(packet, load_key, legacy_keys, LEGACY_SCAN)
+    alert = json.loads(pt)
+    if not isinstance(alert, dict) or "timestamp" not in alert or "error" not in alert:
+        raise ValueError(f"malformed alert: {pt[:80]!r}")
+    alert["error"] = float(alert["error"])
+    return alert, key_id, hdr[1] if hdr else None
 
-log("[listener] ready and listening for input...")
 
-for line in sys.stdin:
-    line = line.strip()
-    log(f"[listener] raw line: {line}")
+class Listener:
+    def __init__(self, log_path=LOG_PATH, db=ALERTS_DB, trace=TRACE, workers=WORKERS):
+        self.log_file = open(log_path, "w", buffering=1, encoding="utf-8")   # line-buffered
+        self.trace    = trace
+        self.store    = KeyStore(KEYS, feed=KeySubscriber(KEY_BUS) if KEY_BUS else None,
+                                 cache_size=KEY_CACHE_SIZE, cache_ttl=KEY_CACHE_TTL)
+        self.alerts   = AlertStore(db)   # queried by the dashboard and `python src/alert_store.py`
+        self.pool     = OrderedPool(self._decrypt, self._emit, workers, log=self._warn)
+        self._keys    = threading.Lock()  # vault/archive reads are not thread-safe
 
-    if not line.startswith("enc_alert="):
-        log(f"[listener] skipped (not alert): {line}")
-        continue
+    def log(self, msg):
+        print(msg)
+        print(msg, file=self.log_file)
 
-    try:
-        packet = bytes.fromhex(line.split("=", 1)[1])
-        nonce, ct = packet[:12], packet[12:]
+    def _warn(self, msg):
+        print(msg, file=sys.stderr)        # not via log(): the log file may be what failed
+
+    def _load_key(self, key_id):
+        with self._keys:
+            return self.store.get(key_id)
 
-        log(f"Raw packet: {packet.hex()}")
-        log(f"Nonce: {nonce.hex()}")
-        log(f"Ciphertext: {ct.hex()}")
+    def _legacy_keys(self):
+        with self._keys:
+            keys = list(islice(self.store.legacy_keys(), LEGACY_SCAN))
+        yield from keys
 
-        # Try all keys to find correct one
-        for key_path in sorted(KEYS.glob("*.bin"), reverse=True):
+    def _decrypt(self, packet):
+        return decrypt(packet, self._load_key, self._legacy_keys())
+
+    def _emit(self, source, packet, result, error):
+        if self.trace:
             try:
-                key = key_path.read_bytes()
-                aes = AESGCM(key)
-                pt = aes.decrypt(nonce, ct, None)
-                alert = json.loads(pt)
-                log(f"[listener] decrypted with {key_path.name}")
-                break
+                hdr = parse_header(packet)
             except Exception:
-                continue
+                hdr = None
+            off = hdr[2] if hdr else 0
+            self.log(f"Raw packet: {packet.hex()}")
+            if hdr:
+                self.log(f"Key ID: {hdr[0]}" + (f" (subkey #{hdr[1]})" if hdr[1] is not None else ""))
+            self.log(f"Nonce: {packet[off:off + 12].hex()}")
+            self.log(f"Ciphertext: {packet[off + 12:].hex()}")
+        if error is not None:
+            self.log(f"❌ Decrypt failed: {error}")
+            return
+        alert, key_id, subkey = result
+        self.log(f"[listener] decrypted with {key_id}.bin" + (f" from {source}" if source != "stdin" else ""))
+        self.alerts.add(alert, key_id, subkey)
+
+        self.log("🚨 Decrypted alert:")
+        self.log(f"   Timestamp : {alert['timestamp']}")
+        self.log(f"   Error     : {alert['error']:.2f}")
+        self.log(f"   Key File  : {alert.get('key_file', 'unknown')}")
+
+    def handle_packet(self, packet: bytes, source="stdin"):
+        """Queue one packet for decryption; it is logged and stored in arrival order per source."""
+        self.pool.submit(source, packet)
+
+    def handle_line(self, line: str):
+        line = line.strip()
+        self.log(f"[listener] raw line: {line}")
+        if not line.startswith("enc_alert="):
+            self.log(f"[listener] skipped (not alert): {line}")
+            return
+        try:
+            packet = bytes.fromhex(line.split("=", 1)[1])
+        except ValueError as e:
+            self.log(f"❌ Decrypt failed: {e}")
+            return
+        self.handle_packet(packet)
+
+    def close(self):
+        self.pool.close()
+        self.alerts.close()
+        if self.pool.failed:
+            self._warn(f"[listener] {self.pool.failed} alerts could not be logged or stored")
+        self.log(f"[listener] key cache: {self.store.cache.stats()}")
+        self.log_file.close()
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="decrypt and store alerts")
+    ap.add_argument("--serve", metavar="ADDR",
+                    help="tcp://host:port, udp://host:port or unix:///path instead of stdin")
+    ap.add_argument("--no-trace", action="store_true", help="do not log packet hex for every alert")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="decryption threads (0: inline)")
+    args = ap.parse_args(argv)
+
+    listener = Listener(trace=TRACE and not args.no_trace, workers=args.workers)
+    listener.log("[listener] ready and listening for input...")
+    try:
+        if args.serve:
+            asyncio.run(AlertServer(args.serve, lambda src, pkt: listener.handle_packet(pkt, src),
+                                    log=listener.log).run())
         else:
-            raise ValueError("❌ No valid key found to decrypt the alert.")
+            for line in sys.stdin:
+                listener.handle_line(line)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
 
-        log("🚨 Decrypted alert:")
-        log(f"   Timestamp : {alert['timestamp']}")
-        log(f"   Error     : {alert['error']:.2f}")
-        log(f"   Key File  : {alert.get('key_file', 'unknown')}")
 
-    except Exception as e:
-        log(f"❌ Decrypt failed: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""LSTM autoencoder definition and its feature/window configuration.
+
+Importing this module only defines the network; data loading and training
+live in inject_anomalies.py and run only when that script is executed.
+"""
+from pathlib import Path
+import torch, torch.nn as nn
+
+ROOT       = Path(__file__).resolve().parents[1]
+MODEL_PATH = ROOT / "model" / "lstm_ae.pt"
+COLS       = ["V_real", "V_imag", "time"]
+SEQ        = 60
+
+
+class AE(nn.Module):
+    def __init__(self, d):
+        super().__init__()
+        self.enc = nn.LSTM(d, 64, batch_first=True)
+        self.dec = nn.LSTM(64, d, batch_first=True)
+    def forward(self, x):
+        _, (h, _) = self.enc(x)
+        h = h.repeat(x.size(1), 1, 1).transpose(0, 1)
+        out, _ = self.dec(h)
+        return out
+
+
+def load_model(path=MODEL_PATH, d=len(COLS)):
+    """Trained autoencoder from *path*, on CPU, in eval mode."""
+    net = AE(d)
+    net.load_state_dict(torch.load(path, map_location="cpu", weights_only=True))
+    net.eval()
+    return net
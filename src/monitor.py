@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
-import sys, os, time, json, torch, pandas as pd
+import sys, os, time, json, torch, numpy as np
 from pathlib import Path
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from inject_anomalies import AE, COLS, SEQ
+from collections import deque
+from model import COLS, load_model
+from packet import seal
+from key_vault import KeyVault
+from key_allocator import KeyAllocator, KeyStarvedError
+from key_bus import KeySubscriber
+from csv_tail import CsvTailer
+from ring_window import RingWindow
+from alert_server import FrameSender
 
 
 # ─── Configuration ──────────────────────────────────────────────────────────
@@ -11,30 +18,84 @@ CSV       = ROOT / "data" / "annotated.csv"
 KEYS      = ROOT / "keys"
 WINDOW    = 10
 THRESHOLD = 1e+00
+BATCH     = 4096         # windows per forward pass when replaying a backlog
+KEY_POLICY   = "wait"    # wait | queue | derive — when no unused key is left
+KEY_DEADLINE = 5.0       # seconds the "wait" policy blocks for a fresh key
+MAX_DERIVED  = 1024      # "derive" policy: subkeys per QKD key
+SUBKEYS_PER_KEY = 0      # >0: every alert uses an HKDF subkey, this many per QKD key
+QUEUE_MAX    = 10_000    # "queue" policy: alerts held back while starved
+METRICS_EVERY = 60.0     # seconds between key-allocation metric reports
+KEY_BUS   = None         # e.g. KEYS / "keybus.sock" to take keys from `qkd_producer.py --publish`
+LISTENER  = None         # e.g. "tcp://127.0.0.1:9750" for `listener.py --serve`; None: stdout
 # ─────────────────────────────────────────────────────────────────────────────
 
-def get_latest_key_path():
-    files = sorted(KEYS.glob("*.bin"))
-    if not files:
-        raise FileNotFoundError("No QKD keys found")
-    return files[-1]
+if KEY_BUS:
+    key_source = KeySubscriber(KEY_BUS)
+    if not key_source.wait_ready(timeout=10):
+        print(f"[DEBUG] key bus {KEY_BUS} not caught up yet, continuing", file=sys.stderr)
+else:
+    key_source = KeyVault(KEYS / "vault.qkv", create=True)
+allocator = KeyAllocator(key_source, KEYS / "consumed.ledger",
+                         policy=KEY_POLICY, deadline=KEY_DEADLINE, max_derived=MAX_DERIVED,
+                         subkeys_per_key=SUBKEYS_PER_KEY)
+pending = deque()
+dropped = 0              # alerts lost to key starvation
+sender = FrameSender(LISTENER) if LISTENER else None
+
+def emit(alert, lease):
+    payload = json.dumps({**alert, "key_file": f"{lease.key_id}.bin"}).encode()
+    try:
+        packet = seal(lease.key, lease.key_id, payload, os.urandom(12), lease.counter)
+        print(f"[DEBUG] encryption succeeded with key {lease.key_id}"
+              + (f" (subkey #{lease.counter})" if lease.counter is not None else ""), file=sys.stderr)
+    except Exception as e:
+        print(f"[ERROR] encryption failed: {e}", file=sys.stderr)
+        return
+    if sender:
+        try:
+            sender.send(packet)
+        except OSError as e:
+            print(f"[ERROR] alert lost, send to {LISTENER} failed: {e}", file=sys.stderr)
+    else:
+        sys.stdout.write(f"enc_alert={packet.hex()}\n")
+        sys.stdout.flush()
+
+def drop_alert(alert, reason):
+    global dropped
+    dropped += 1
+    print(f"[ERROR] alert dropped ({alert['timestamp']}, err={alert['error']:.2e}): {reason}; "
+          f"{dropped} dropped so far", file=sys.stderr)
+
+def queue_alert(alert):
+    if len(pending) >= QUEUE_MAX:
+        drop_alert(alert, f"{QUEUE_MAX} alerts already waiting for a key")
+        return
+    pending.append(alert)
+
+def flush_alerts():
+    # every alert gets its own never-used key, oldest alert first
+    while pending:
+        try:
+            lease = allocator.allocate()
+        except KeyStarvedError as e:
+            if KEY_POLICY != "queue":
+                drop_alert(pending.popleft(), e)
+            else:
+                print(f"[DEBUG] key pool empty, {len(pending)} alerts queued", file=sys.stderr)
+            return
+        emit(pending.popleft(), lease)
 
 print("[DEBUG] loading model…", file=sys.stderr)
-state = torch.load(ROOT / "model" / "lstm_ae.pt", map_location="cpu")
-net = AE(len(COLS)); net.load_state_dict(state); net.eval()
+net = load_model(ROOT / "model" / "lstm_ae.pt", len(COLS))
 print("[DEBUG] model ready", file=sys.stderr)
 
-buff = []
-lines_consumed = 0
+ring = RingWindow(WINDOW, 3, capacity=BATCH)
+tail = CsvTailer(CSV)
+last_metrics = time.monotonic()
 print("📡  monitoring …  Ctrl‑C to stop", file=sys.stderr, flush=True)
 
-while True:
-    with open(CSV, "r") as f:
-        lines = f.readlines()[lines_consumed:]
-    lines_consumed += len(lines)
-    if lines:
-        print(f"[DEBUG] {len(lines)} new lines", file=sys.stderr)
-
+def parse(lines):
+    stamps, rows = [], []
     for ln in lines:
         ln = ln.strip()
         if not ln or ln.startswith("timestamp"): continue
@@ -51,37 +112,41 @@ while True:
             sec = float(sec_s)
         except ValueError:
             continue
+        stamps.append(ts_raw)
+        rows.append((p, q, sec))
+    return stamps, rows
+
+while True:
+    flush_alerts()
+    if time.monotonic() - last_metrics >= METRICS_EVERY:
+        print(f"[DEBUG] key allocator: {allocator.metrics()}, {dropped} alerts dropped", file=sys.stderr)
+        last_metrics = time.monotonic()
+
+    lines = tail.poll()
+    if lines:
+        print(f"[DEBUG] {len(lines)} new lines", file=sys.stderr)
 
-        buff.append([p, q, sec])
-        if len(buff) > WINDOW:
-            buff.pop(0)
-
-        if len(buff) == WINDOW:
-            x = torch.tensor(buff, dtype=torch.float32).unsqueeze(0)
-            err = ((net(x) - x) ** 2).mean().item()
-
-            print(f"[debug] t={sec:.1f}s  err={err:.2e}", file=sys.stderr, flush=True)
-
-            if err > THRESHOLD:
-                print(f"[!!! ALERT_TRIPPED !!!] err={err:.2e} > {THRESHOLD:.2e}", file=sys.stderr)
-
-                key_path = get_latest_key_path()
-                key = key_path.read_bytes()
-                aes = AESGCM(key)
-                nonce = os.urandom(12)
-                payload = json.dumps({
-                    "timestamp": ts_raw,
-                    "error": err,
-                    "key_file": key_path.name
-                }).encode()
-
-                try:
-                    ct = aes.encrypt(nonce, payload, None)
-                    packet = nonce + ct
-                    sys.stdout.write(f"enc_alert={packet.hex()}\n")
-                    sys.stdout.flush()
-                    print(f"[DEBUG] encryption succeeded with {key_path.name}", file=sys.stderr)
-                except Exception as e:
-                    print(f"[ERROR] encryption failed: {e}", file=sys.stderr)
-
-    time.sleep(1)
\ No newline at end of file
+    t0 = time.perf_counter()
+    stamps, rows = parse(lines)
+    scored = 0
+    for first, windows in ring.push(rows):
+        # every window the new rows complete, in one no-grad forward pass
+        with torch.inference_mode():
+            x = torch.from_numpy(windows)
+            errs = ((net(x) - x) ** 2).mean(dim=(1, 2)).numpy()
+        secs = windows[:, -1, 2]
+        sys.stderr.write("".join(f"[debug] t={t:.1f}s  err={e:.2e}\n" for t, e in zip(secs, errs)))
+        scored += len(errs)
+
+        for j in np.flatnonzero(errs > THRESHOLD):
+            err = float(errs[j])
+            print(f"[!!! ALERT_TRIPPED !!!] err={err:.2e} > {THRESHOLD:.2e}", file=sys.stderr)
+            queue_alert({"timestamp": stamps[first + j], "error": err})
+            flush_alerts()
+    if scored:
+        dt = time.perf_counter() - t0
+        print(f"[DEBUG] scored {scored} windows in {dt * 1e3:.1f} ms "
+              f"({len(rows) / dt:,.0f} rows/s)", file=sys.stderr, flush=True)
+
+    if not tail.pending():
+        time.sleep(1)
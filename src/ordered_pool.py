@@ -0,0 +1,74 @@
+"""Thread pool that runs work concurrently but emits results in order per source.
+
+``submit(source, item)`` runs ``work(item)`` on a worker.  Results are passed
+to ``emit(source, item, result, error)``, and for each source they come out
+in the order the items were submitted.  Sources do not wait on each other.
+``emit`` calls are serialized, so it may log or write to a store without
+locking of its own.  If ``emit`` raises, the error is passed to ``log``,
+counted in ``failed``, and draining carries on with the next item.  At most
+``max_inflight`` items are pending, and ``submit`` blocks beyond that, which
+pushes back on whoever feeds the pool.
+With ``workers=0`` everything runs inline in ``submit``.
+"""
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OrderedPool:
+    def __init__(self, work, emit, workers=4, max_inflight=None, log=print):
+        self.work     = work
+        self.emit     = emit
+        self.log      = log
+        self.failed   = 0                  # emit calls that raised
+        self.workers  = workers
+        self.pool     = ThreadPoolExecutor(workers, thread_name_prefix="decrypt") if workers else None
+        self.slots    = threading.BoundedSemaphore(max_inflight or 8 * max(workers, 1))
+        self._queues  = {}                 # source → deque of (item, future), submission order
+        self._lock    = threading.Lock()   # guards _queues
+        self._emit    = threading.Lock()   # one emitter at a time
+
+    def submit(self, source, item):
+        if self.pool is None:
+            try:
+                result, error = self.work(item), None
+            except Exception as e:
+                result, error = None, e
+            self._emit_one(source, item, result, error)
+            return
+        self.slots.acquire()
+        fut = self.pool.submit(self.work, item)
+        with self._lock:
+            self._queues.setdefault(source, deque()).append((item, fut))
+        fut.add_done_callback(lambda _: self._drain(source))
+
+    def _drain(self, source):
+        with self._emit:
+            while True:
+                with self._lock:
+                    q = self._queues.get(source)
+                    if not q or not q[0][1].done():
+                        if q is not None and not q:
+                            del self._queues[source]
+                        return
+                    item, fut = q.popleft()
+                error = fut.exception()
+                try:
+                    self._emit_one(source, item, None if error else fut.result(), error)
+                finally:
+                    self.slots.release()
+
+    def _emit_one(self, source, item, result, error):
+        try:
+            self.emit(source, item, result, error)
+        except Exception as e:
+            self.failed += 1
+            try:
+                self.log(f"[pool] emit failed for {source}: {type(e).__name__}: {e}")
+            except Exception:
+                pass                       # the logger itself is what broke
+
+    def close(self):
+        """Wait for every submitted item to be emitted."""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
@@ -0,0 +1,97 @@
+"""Binary alert packet format.
+
+    header = MAGIC(2) | VERSION(1) | FLAGS(1) | KEY_ID(8, big-endian)
+             [| COUNTER(4) when FLAGS & FLAG_DERIVED]
+    packet = header | nonce(12) | AES-GCM ciphertext+tag
+
+The header is passed to AES-GCM as associated data, so the key id cannot be
+tampered with without failing the tag check.  Packets without the magic are
+the legacy ``nonce | ct`` layout and can only be opened by trial decryption.
+
+With FLAG_DERIVED the AES key is not the QKD key itself but an HKDF-SHA256
+subkey of it, bound to the key id and the per-master counter.
+"""
+import struct
+from itertools import islice
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.exceptions import InvalidTag
+
+MAGIC     = b"QK"
+VERSION   = 1
+HEADER    = struct.Struct(">2sBBQ")
+COUNTER   = struct.Struct(">I")
+NONCE_LEN = 12
+
+FLAG_DERIVED = 0x01
+
+
+class PacketError(ValueError):
+    pass
+
+
+def derive_key(master: bytes, key_id: int, counter: int) -> bytes:
+    info = b"qkd-alert-subkey" + struct.pack(">QI", key_id, counter)
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info).derive(master)
+
+
+def seal(key: bytes, key_id: int, payload: bytes, nonce: bytes, counter=None) -> bytes:
+    """Encrypt *payload*; with *counter* the key is a derived subkey of *key*."""
+    if counter is None:
+        header = HEADER.pack(MAGIC, VERSION, 0, key_id)
+    else:
+        header = HEADER.pack(MAGIC, VERSION, FLAG_DERIVED, key_id) + COUNTER.pack(counter)
+        key = derive_key(key, key_id, counter)
+    return header + nonce + AESGCM(key).encrypt(nonce, payload, header)
+
+
+def parse_header(packet: bytes):
+    """Return ``(key_id, counter, header_len)`` or ``None`` for a legacy packet.
+
+    ``counter`` is ``None`` unless the packet was sealed with a derived key.
+    A legacy nonce can start with MAGIC by chance (p = 2**-16), so anything
+    that is not a well-formed header of this VERSION counts as legacy too.
+    """
+    if len(packet) < HEADER.size + NONCE_LEN or packet[:2] != MAGIC:
+        return None
+    _, version, flags, key_id = HEADER.unpack_from(packet)
+    if version != VERSION:
+        return None
+    if flags & FLAG_DERIVED:
+        return key_id, COUNTER.unpack_from(packet, HEADER.size)[0], HEADER.size + COUNTER.size
+    return key_id, None, HEADER.size
+
+
+def open_packet(packet: bytes, load_key, legacy_keys=(), legacy_limit=64):
+    """Decrypt *packet* and return ``(plaintext, key_id)``.
+
+    ``load_key(key_id)`` resolves a key directly for versioned packets.
+    ``legacy_keys`` yields ``(key_id, key)`` pairs (newest first) and is only
+    consumed for packets without a usable header (see ``parse_header``) or
+    whose header key does not open them, at most ``legacy_limit`` of them.
+    """
+    hdr = parse_header(packet)
+    if hdr is not None:
+        key_id, counter, n = hdr
+        header, nonce, ct = packet[:n], packet[n:n + NONCE_LEN], packet[n + NONCE_LEN:]
+        try:
+            key = load_key(key_id)
+        except (KeyError, FileNotFoundError):
+            key = None
+        if key is not None:
+            if counter is not None:
+                key = derive_key(key, key_id, counter)
+            try:
+                return AESGCM(key).decrypt(nonce, ct, header), key_id
+            except InvalidTag:
+                pass
+        # not ours after all: a legacy nonce that happens to look like a header
+
+    nonce, ct = packet[:NONCE_LEN], packet[NONCE_LEN:]
+    for key_id, key in islice(legacy_keys, legacy_limit):
+        try:
+            return AESGCM(key).decrypt(nonce, ct, None), key_id
+        except InvalidTag:
+            continue
+    raise PacketError("❌ No valid key found to decrypt the alert.")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Vectorized parsing of GridLAB-D complex values.
+
+Recorder files hold phasors as text in rectangular or polar form, optionally
+parenthesised (pandas' own ``to_csv`` of complex values) or followed by a unit:
+
+    -1140.87+2161.1j    (-1140.87+2161.1j)    +7199.56-0.0012i V
+    +7200+30d           +7200-0.5236r         1.2e+03-4.5e-01j
+
+``parse_complex`` turns a column of such strings into float arrays (real,
+imag); anything unparseable is NaN.  The plain ``a+bj`` / ``(a+bj)`` form that
+GridLAB-D and pandas write goes through CPython's ``complex`` in one C-level
+pass; a column with other forms is parsed with array operations over its
+bytes, and a regex is the last resort.
+
+Benchmark:  python src/phasor.py [--rows N]
+"""
+import numpy as np
+import pandas as pd
+
+_NUM = r"(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+PATTERN = (rf"^\s*\(?\s*([+-]?{_NUM})"            # real part / magnitude
+           rf"\s*(?:([+-])\s*({_NUM})\s*([ijdr]))?"  # signed imag part / angle + form
+           rf"\s*\)?\s*[A-Za-z]*\s*$")                # optional unit
+
+
+def _table(chars):
+    t = np.zeros(256, bool)
+    t[list(chars)] = True
+    return t
+
+_DIGITS  = _table(b"0123456789")
+_NUMERIC = _table(b"0123456789.+-eE")
+_ALLOWED = _table(b"0123456789.+-eE ()\0")     # allowed before the form character
+_LEAD    = _table(b" (\0")
+_SIGN    = _table(b"+-")
+_EXP     = _table(b"eE")
+_FORMS   = _table(b"ijdr")
+BLOCK    = 1 << 16                              # rows per pass, keeps temporaries in cache
+SPACE    = np.uint8(ord(" "))
+
+
+def _parse_bytes(b):
+    """Fast path: locate the parts in the (rows, width) byte matrix and blank
+    out everything else, so numpy's bytes->float cast parses both columns."""
+    n, w = len(b), b.dtype.itemsize
+    m = b.view(np.uint8).reshape(n, w)
+    cols = np.arange(w)
+    prev = np.empty_like(m); prev[:, 0] = 0; prev[:, 1:] = m[:, :-1]
+    first = np.argmax(~_LEAD[m], axis=1)
+    # the imaginary sign is the last +/- after the first character that is not an exponent sign
+    cand = _SIGN[m] & ~_EXP[prev] & (cols > first[:, None])
+    has_imag = cand.any(1)
+    split = np.where(has_imag, w - 1 - np.argmax(cand[:, ::-1], axis=1), w)
+    head = cols < split[:, None]
+    fmask = _FORMS[m] & ~head
+    has_form = fmask.any(1)
+    fpos = np.where(has_form, np.argmax(fmask, axis=1), w)
+    form = np.where(has_form, m[np.arange(n), np.minimum(fpos, w - 1)], 0)
+    body = cols < fpos[:, None]
+
+    numeric = _NUMERIC[m]
+    re_m = np.where(numeric & head, m, SPACE)
+    im_m = np.where(numeric & ~head & body, m, SPACE)
+    bad = (~_ALLOWED[m] & body).any(1) | (has_imag != has_form) | ~(_DIGITS[m] & head).any(1)
+    if bad.any():
+        re_m[bad] = im_m[bad] = SPACE
+        re_m[bad, :3] = list(b"nan")
+    im_m[bad | ~has_imag, 0] = ord("0")
+    real = re_m.view(f"S{w}").ravel().astype(float)
+    imag = im_m.view(f"S{w}").ravel().astype(float)
+    imag[bad] = np.nan
+    return real, imag, form
+
+
+def _parse_regex(s):
+    """Fallback for input the byte path cannot take (non-ASCII, malformed numbers)."""
+    parts = s.astype(str).str.extract(PATTERN)
+    real = pd.to_numeric(parts[0], errors="coerce").to_numpy(dtype=float)
+    imag = pd.to_numeric(parts[2], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    imag = np.where((parts[1] == "-").to_numpy(), -imag, imag)
+    imag[np.isnan(real)] = np.nan
+    form = parts[3].map({"d": ord("d"), "r": ord("r")}).fillna(0).to_numpy(dtype=int)
+    return real, imag, form
+
+
+def parse_complex(values):
+    """``(real, imag)`` float64 arrays for a column of complex strings."""
+    s = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    try:
+        z = np.fromiter(map(complex, s.to_numpy()), dtype=complex, count=len(s))
+        real, imag = z.real.copy(), z.imag.copy()
+        imag[np.isnan(real)] = np.nan
+        return real, imag
+    except (ValueError, TypeError):
+        pass
+    try:
+        b = s.to_numpy(dtype="S")
+        real, imag, form = (np.concatenate(p) if len(b) else np.empty(0) for p in
+                            zip(*(_parse_bytes(b[i:i + BLOCK]) for i in range(0, len(b), BLOCK))))
+    except (UnicodeEncodeError, ValueError, TypeError):
+        real, imag, form = _parse_regex(s)
+
+    polar = (form == ord("d")) | (form == ord("r"))
+    if polar.any():
+        ang = np.where(form == ord("d"), np.deg2rad(imag), imag)
+        real, imag = np.where(polar, real * np.cos(ang), real), np.where(polar, real * np.sin(ang), imag)
+    return real, imag
+
+
+def parse_phasor(values):
+    """Complex128 array; NaN+NaNj where a value could not be parsed."""
+    real, imag = parse_complex(values)
+    return real + 1j * imag
+
+
+if __name__ == "__main__":
+    import time, argparse
+    ap = argparse.ArgumentParser(description="phasor parsing benchmark")
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    z = rng.normal(0, 2000, args.rows) + 1j * rng.normal(0, 2000, args.rows)
+    col = pd.Series([f"{v.real:+.2f}{v.imag:+.2f}j" for v in z])
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - t0
+
+    def row_by_row():              # what train_lstm_ae.py did
+        c = col.apply(lambda x: complex(x) if isinstance(x, str) and "+" in x else np.nan)
+        return (c.apply(lambda v: v.real if pd.notnull(v) else np.nan),
+                c.apply(lambda v: v.imag if pd.notnull(v) else np.nan))
+
+    def two_regex():               # what eval.py / app.py / inject_anomalies.py did
+        return (col.str.extract(r"([-+]?\d*\.?\d+)")[0].astype(float),
+                col.str.extract(r"\+(\d*\.?\d+)j")[0].astype(float))
+
+    (re_, im_), t_new = timed(lambda: parse_complex(col))
+    mixed = col.str.replace("j", "i")                     # not accepted by complex(): array path
+    (re2, im2), t_mixed = timed(lambda: parse_complex(mixed))
+    _, t_apply = timed(row_by_row)
+    (_, im_old), t_regex = timed(two_regex)
+    lost = ~np.isclose(im_old, z.imag, atol=0.006)
+    exact = all(np.allclose(a, b, atol=0.006) for a, b in
+                ((re_, z.real), (im_, z.imag), (re2, z.real), (im2, z.imag)))
+    print(f"{args.rows:,} rows   parse_complex {t_new:.2f} s (\"a+bi\" form: {t_mixed:.2f} s)   "
+          f"row-by-row apply {t_apply:.2f} s   two regex extracts {t_regex:.2f} s")
+    print(f"parse_complex matches the source values: {exact};  "
+          f"old imag regex lost the value or sign on {lost.mean():.1%} of rows")
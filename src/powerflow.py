@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""NumPy power-flow surrogate for sim/ieee13.glm — recorder CSVs without GridLAB-D.
+
+The feeder (lines, conductors, spacings, regulator, transformer, loads, swing
+bus) is read from the .glm file and solved by a three-phase backward/forward
+sweep.  All timesteps of a block are solved at once: bus voltages are a
+(buses, 3, timesteps) array, so every sweep is one 3x3 product per branch on
+a contiguous (3, timesteps) slab.  Loads follow a seeded daily profile with noise, and the
+recorder's meter is written in GridLAB-D's recorder format, ready for
+train_lstm_ae.py.
+
+Modelling is that of Kersting's radial-feeder chapters: modified Carson line
+impedances with Kron-reduced neutrals (concentric neutrals for underground
+cable), ideal wye-wye transformer behind its series impedance, regulator as
+fixed per-phase taps.  Line charging is neglected.
+
+Usage:  python src/powerflow.py [--glm FILE] [--seconds N] [--interval S]
+                                [--props voltage_A,voltage_C] [--seed S] [--flat]
+                                [--out CSV]
+"""
+import re
+import time
+import getpass
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from phasor import parse_phasor
+
+ROOT = Path(__file__).resolve().parents[1]
+GLM  = ROOT / "sim" / "ieee13.glm"
+OUT  = ROOT / "data" / "raw_surrogate.csv"
+
+# ─── Configuration ──────────────────────────────────────────────────────────
+BLOCK     = 1 << 16          # timesteps solved together
+TOL       = 1e-6             # convergence, per unit of the swing voltage
+MAX_ITER  = 100
+DAILY     = 0.25             # load swing around its .glm value over a day
+NOISE     = 0.02             # per-load, per-step multiplicative noise (std)
+TIMEZONES = {"EST+5EDT": "US/Eastern", "CST+6CDT": "US/Central",
+             "MST+7MDT": "US/Mountain", "PST+8PDT": "US/Pacific"}
+PHASES    = "ABC"
+LINKS     = ("overhead_line", "underground_line", "switch", "transformer", "regulator")
+BUSES     = ("node", "load", "meter")
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+# ---------- .glm parsing -----------------------------------------------------
+def parse_glm(path=GLM):
+    """``(objects, clock)``: ``{name: {"class": …, prop: value}}`` and the clock block."""
+    text = re.sub(r"//[^\n]*", "", Path(path).read_text())
+    objects = {}
+    for i, (cls, body) in enumerate(re.findall(r"object\s+(\w+)\s*(?::\s*\d+)?\s*\{([^{}]*)\}", text)):
+        props = {"class": cls}
+        for line in body.split(";"):
+            parts = line.split(None, 1)
+            if len(parts) == 2:
+                key, value = parts[0], parts[1].strip().strip('"')
+                props[key] = f"{props[key]},{value}" if key in props else value   # repeated ``property``
+        objects[props.get("name", f"{cls}:{i}")] = props
+    clock = dict(line.split(None, 1) for line in
+                 re.search(r"clock\s*\{([^{}]*)\}", text).group(1).replace(";", "\n").splitlines()
+                 if line.strip())
+    return objects, {k: v.strip().strip("'\"") for k, v in clock.items()}
+
+
+def _num(v):
+    return float(v.split()[0])
+
+
+def _cx(v):
+    return complex(parse_phasor(pd.Series([v.split()[0]]))[0])
+
+
+# ---------- line impedances --------------------------------------------------
+def _carson(r, gmr, dist):
+    """Modified Carson primitive impedance matrix, Ω/mile (r Ω/mile, gmr/dist ft)."""
+    n = len(r)
+    d = np.where(np.eye(n, dtype=bool), np.asarray(gmr)[:, None], dist)
+    return 0.09530 + 0.12134j * (np.log(1 / d) + 7.93402) + np.diag(r)
+
+
+def line_impedance(objects, line):
+    """3x3 phase impedance (Ω) of an overhead or underground line."""
+    config = objects[line["configuration"]]
+    spacing = objects.get(config.get("spacing"), {})
+    underground = line["class"] == "underground_line"
+
+    def dist(a, b):
+        key = next((f"distance_{x}{y}" for x, y in ((a, b), (b, a)) if f"distance_{x}{y}" in spacing), None)
+        return _num(spacing[key]) if key else 1.0      # unused pairs: any positive value
+
+    names, r, gmr = [], [], []
+    for p in PHASES + "N":
+        if f"conductor_{p}" not in config:
+            continue
+        c = objects[config[f"conductor_{p}"]]
+        names.append((p, p))
+        r.append(_num(c["conductor_resistance" if underground else "resistance"]))
+        gmr.append(_num(c["conductor_gmr" if underground else "geometric_mean_radius"]))
+    if underground and "conductor_N" not in config:     # concentric neutral per phase cable
+        for p in [n for n, _ in names]:
+            c = objects[config[f"conductor_{p}"]]
+            k = _num(c["neutral_strands"])
+            R = (_num(c["outer_diameter"]) - _num(c["neutral_diameter"])) / 24
+            names.append(("N", p))
+            r.append(_num(c["neutral_resistance"]) / k)
+            gmr.append((_num(c["neutral_gmr"]) * k * R ** (k - 1)) ** (1 / k))
+
+    def pair_dist(u, v):
+        (pu, ou), (pv, ov) = u, v
+        if ou == ov:                                   # a cable and its own neutral
+            c = objects[config[f"conductor_{ou}"]]
+            return (_num(c["outer_diameter"]) - _num(c["neutral_diameter"])) / 24
+        return dist(ou if pu == "N" and ou != "N" else pu, ov if pv == "N" and ov != "N" else pv)
+
+    D = np.array([[pair_dist(u, v) if i != j else 1.0 for j, v in enumerate(names)]
+                  for i, u in enumerate(names)])
+    z = _carson(np.array(r), np.array(gmr), D)
+    ph = [i for i, (p, o) in enumerate(names) if p != "N"]
+    nn = [i for i, (p, o) in enumerate(names) if p == "N"]
+    zp = z[np.ix_(ph, ph)]
+    if nn:                                             # Kron reduction of the neutrals
+        zp = zp - z[np.ix_(ph, nn)] @ np.linalg.solve(z[np.ix_(nn, nn)], z[np.ix_(nn, ph)])
+    Z = np.zeros((3, 3), complex)
+    idx = [PHASES.index(names[i][0]) for i in ph]
+    Z[np.ix_(idx, idx)] = zp
+    return Z * _num(line["length"]) / 5280
+
+
+# ---------- network ----------------------------------------------------------
+class Feeder:
+    """Radial feeder from a .glm: branch matrices in sweep order and load tables.
+
+    Per branch ``V_to = A V_from - B I_to`` and ``I_from = D I_to``.
+    """
+
+    def __init__(self, objects):
+        self.objects = objects
+        alias = {}
+        for name, o in objects.items():
+            if o["class"] in BUSES:
+                alias[name] = name
+        for name in alias:                              # meters / child loads share their parent's bus
+            p = name
+            while objects[p].get("parent") in alias:
+                p = objects[p]["parent"]
+            alias[name] = p
+        self.alias = alias
+        self.buses = sorted(set(alias.values()))
+        bus_idx = {b: i for i, b in enumerate(self.buses)}
+        swing = next(n for n, o in objects.items() if o.get("bustype") == "SWING")
+        self.swing = bus_idx[alias[swing]]
+        self.v_swing = np.array([_cx(objects[swing][f"voltage_{p}"]) for p in PHASES])
+
+        links = [(n, o) for n, o in objects.items() if o["class"] in LINKS]
+        children = {}
+        for n, o in links:
+            children.setdefault(alias[o["from"]], []).append((n, o))
+        self.branches = []                              # breadth-first from the swing bus
+        queue = [alias[swing]]
+        while queue:
+            b = queue.pop(0)
+            for n, o in children.get(b, []):
+                A, B, D = self._branch(o)
+                self.branches.append((n, bus_idx[b], bus_idx[alias[o["to"]]], A, B, D))
+                queue.append(alias[o["to"]])
+        self.A = np.array([br[3] for br in self.branches])
+        self.B = np.array([br[4] for br in self.branches])
+        self.D = np.array([br[5] for br in self.branches])
+        self._loads(bus_idx)
+
+    def _branch(self, o):
+        mask = np.diag([float(p in o.get("phases", PHASES)) for p in PHASES])
+        cls, I = o["class"], np.eye(3)
+        if cls in ("overhead_line", "underground_line"):
+            return mask, line_impedance(self.objects, o), mask
+        if cls == "switch":
+            closed = o.get("status", "CLOSED").upper() == "CLOSED"
+            return mask * closed, np.zeros((3, 3)), mask * closed
+        if cls == "transformer":
+            c = self.objects[o["configuration"]]
+            nt = _num(c["primary_voltage"]) / _num(c["secondary_voltage"])
+            zbase = _num(c["secondary_voltage"]) ** 2 / (_num(c["power_rating"]) * 1e3)
+            zt = complex(_num(c["resistance"]), _num(c["reactance"])) * zbase
+            return mask / nt, zt * mask, mask / nt
+        c = self.objects[o["configuration"]]             # regulator: fixed taps
+        step = _num(c["regulation"]) / _num(c["raise_taps"])
+        a = np.diag([1 + step * _num(c.get(f"tap_pos_{p}", "0")) for p in PHASES]) @ mask
+        return a, np.zeros((3, 3)), a
+
+    def _loads(self, bus_idx):
+        rows = [(n, o) for n, o in self.objects.items() if o["class"] == "load"]
+        self.load_names = [n for n, _ in rows]
+        self.load_bus = np.array([bus_idx[self.alias[n]] for n, _ in rows])
+        self.delta = np.array(["D" in o.get("phases", "") for _, o in rows])
+
+        def table(prop):
+            return np.array([[_cx(o[f"{prop}_{p}"]) if f"{prop}_{p}" in o else 0j for p in PHASES]
+                             for _, o in rows])
+        self.S = table("constant_power")
+        self.I = table("constant_current")
+        Z = table("constant_impedance")
+        self.Y = np.divide(1, Z, out=np.zeros_like(Z), where=Z != 0)
+        self.S, self.I, self.Y = self.S[:, :, None], self.I[:, :, None], self.Y[:, :, None]
+        self._index_loads()
+
+    def _index_loads(self):
+        self.wye, self.dl = np.flatnonzero(~self.delta), np.flatnonzero(self.delta)
+        self.groups = [(b, np.flatnonzero(self.load_bus == b)) for b in np.unique(self.load_bus)]
+
+    def add_fault(self, bus, phases="A", z=5.0):
+        """Add a phase-to-ground fault (impedance *z* Ω on each of *phases*) at *bus*
+        as an extra load row; its scale (0 or 1) switches it on.  Returns the row."""
+        y = np.array([[1 / complex(z) if p in phases else 0j for p in PHASES]])[:, :, None]
+        self.load_names.append(f"fault@{bus}")
+        self.load_bus = np.append(self.load_bus, self.buses.index(self.alias[bus]))
+        self.delta = np.append(self.delta, False)
+        self.S = np.concatenate([self.S, np.zeros_like(y)])
+        self.I = np.concatenate([self.I, np.zeros_like(y)])
+        self.Y = np.concatenate([self.Y, y])
+        self._index_loads()
+        return len(self.load_names) - 1
+
+    def load_currents(self, V, scale):
+        """Bus injection currents (buses, 3, T) at voltages V for load multipliers scale (loads, T)."""
+        u = V[self.load_bus]                            # (loads, 3, T)
+        u[self.dl] -= np.roll(u[self.dl], -1, axis=1)    # delta loads see line-to-line voltages
+        i = np.divide(self.S, u, out=np.zeros_like(u), where=self.S != 0)
+        np.conjugate(i, out=i)
+        i += self.I
+        i += u * self.Y
+        i *= scale[:, None, :]
+        i[self.dl] -= np.roll(i[self.dl], 1, axis=1)     # branch → line currents
+        acc = np.zeros_like(V)
+        for b, idx in self.groups:
+            acc[b] = i[idx].sum(0)
+        return acc
+
+    def solve(self, scale, tol=TOL, max_iter=MAX_ITER):
+        """Bus voltages (buses, 3, T) and branch currents (branches, 3, T) for scale (loads, T)."""
+        T = scale.shape[1]
+        V = np.repeat(self.v_swing[None, :, None], len(self.buses), 0) * np.ones(T)
+        Ib = np.zeros((len(self.branches), 3, T), complex)
+        limit = tol * np.abs(self.v_swing).max()
+        for it in range(max_iter):
+            acc = self.load_currents(V, scale)
+            for k in range(len(self.branches) - 1, -1, -1):  # backward sweep
+                _, f, t, *_ = self.branches[k]
+                Ib[k] = acc[t]
+                acc[f] += self.D[k] @ Ib[k]
+            change = 0.0
+            for k, (_, f, t, *_) in enumerate(self.branches):  # forward sweep
+                v = self.A[k] @ V[f] - self.B[k] @ Ib[k]
+                change = max(change, np.abs(v - V[t]).max())
+                V[t] = v
+            if change < limit:
+                break
+        else:
+            raise RuntimeError(f"sweep did not converge in {max_iter} iterations")
+        return V, Ib
+
+    def inflow(self, bus):
+        """Index of the branch feeding *bus* (by name)."""
+        b = self.buses.index(self.alias[bus])
+        return next(k for k, br in enumerate(self.branches) if br[2] == b)
+
+
+# ---------- load profiles ----------------------------------------------------
+def load_profile(seconds, n_loads, seed=0, daily=DAILY, noise=NOISE):
+    """(T, n_loads) multipliers: a daily curve, a slow per-load wobble and white noise."""
+    rng = np.random.default_rng(seed)
+    day = 2 * np.pi * (seconds % 86400) / 86400
+    base = 1 + daily * (0.6 * np.sin(day - 2.0) + 0.4 * np.sin(2 * day - 1.0))
+    period = rng.uniform(600, 7200, n_loads)
+    phase = rng.uniform(0, 2 * np.pi, n_loads)
+    wobble = 0.5 * daily * np.sin(2 * np.pi * seconds[:, None] / period + phase) * 0.2
+    return base[:, None] * (1 + wobble) * (1 + noise * rng.standard_normal((len(seconds), n_loads)))
+
+
+# ---------- recorder output --------------------------------------------------
+def _fmt(z):
+    return np.char.add(np.char.add(np.char.mod("%+g", z.real), np.char.mod("%+g", z.imag)), "j")
+
+
+def _stamps(start, seconds, tzspec):
+    """GridLAB-D wall-clock stamps, e.g. ``2000-01-01 00:00:00 EST``, for *start* + seconds."""
+    std, hours, summer = re.fullmatch(r"([A-Z]+)([+-]?\d+)([A-Z]*)", tzspec).groups()
+    local = pd.Timestamp(start).tz_localize(TIMEZONES.get(tzspec, "UTC")) + pd.to_timedelta(seconds, unit="s")
+    wall = local.tz_localize(None)
+    offset = (wall - local.tz_convert("UTC").tz_localize(None)).total_seconds().to_numpy()
+    label = np.where(offset == -3600 * int(hours), f" {std}", f" {summer or std}")
+    return np.char.add(np.char.replace(np.datetime_as_string(wall.to_numpy(), unit="s"), "T", " "), label)
+
+
+def recorder_props(objects):
+    """Meter name and property list of the .glm's recorder."""
+    rec = next(o for o in objects.values() if o["class"] == "recorder")
+    return rec["parent"], [p.strip() for p in rec.get("property", "").split(",") if p.strip()]
+
+
+def run(glm=GLM, out=OUT, seconds=None, interval=None, props=None, seed=0, flat=False, block=BLOCK,
+        load=1.0, daily=DAILY, noise=NOISE, faults=(), quiet=False):
+    """Solve the feeder over the clock (or *seconds*) and write the recorder CSV.
+
+    *load* scales every .glm load; *faults* are dicts ``{"bus", "phases", "z",
+    "start", "stop"}`` (seconds from the start) switched in for that span.
+    """
+    objects, clock = parse_glm(glm)
+    feeder = Feeder(objects)
+    n_loads = len(feeder.load_names)
+    fault_rows = [(feeder.add_fault(x["bus"], x.get("phases", "A"), x.get("z", 5.0)), x) for x in faults]
+    rec = next(o for o in objects.values() if o["class"] == "recorder")
+    meter, recorded = recorder_props(objects)
+    props = props or recorded
+    interval = interval or int(_num(rec.get("interval", "1")))
+    start = pd.Timestamp(clock["starttime"])
+    if seconds is None:
+        seconds = int((pd.Timestamp(clock["stoptime"]) - start).total_seconds())
+    tzspec = clock.get("timezone", "EST+5EDT")
+    bus, feed = feeder.buses.index(feeder.alias[meter]), feeder.inflow(meter)
+
+    t0, steps, energy = time.perf_counter(), np.arange(0, seconds, interval), 0.0
+    with open(out, "w", newline="") as f:
+        f.write(f"# file...... {out}\n# date...... {time.ctime()}\n# user...... {getpass.getuser()}\n"
+                f"# host...... (null)\n# target.... {objects[meter]['class']} {meter}\n"
+                f"# trigger... (none)\n# interval.. {interval}\n# limit..... 0\n"
+                f"# timestamp,{','.join(props)}\n")
+        for i in range(0, len(steps), block):
+            t = steps[i:i + block]
+            scale = np.empty((len(feeder.load_names), len(t)))
+            scale[:n_loads] = load * (1 if flat else
+                                      load_profile(t.astype(float), n_loads, seed + i // block, daily, noise).T)
+            for row, fault in fault_rows:
+                scale[row] = (t >= fault["start"]) & (t < fault["stop"])
+            V, Ib = feeder.solve(scale)
+            cols = [_stamps(start, t, tzspec)]
+            for prop in props:
+                if prop.startswith("voltage_"):
+                    cols.append(_fmt(V[bus, PHASES.index(prop[-1])]))
+                elif prop in ("measured_real_power", "measured_real_energy"):
+                    power = (V[bus] * np.conj(Ib[feed])).real.sum(0)
+                    if prop == "measured_real_energy":
+                        power = energy + np.cumsum(power) * interval / 3600
+                        energy = power[-1]
+                    cols.append(np.char.mod("%+g", power))
+                else:
+                    raise ValueError(f"unsupported recorder property {prop!r}")
+            line = cols[0]
+            for c in cols[1:]:
+                line = np.char.add(np.char.add(line, ","), c)
+            f.write("\n".join(line) + "\n")
+    dt = time.perf_counter() - t0
+    if not quiet:
+        print(f"✓ {len(steps):,} timesteps in {dt:.2f} s ({len(steps) / dt:,.0f} steps/s) → {out}")
+    return len(steps)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="IEEE-13 power-flow surrogate")
+    ap.add_argument("--glm", type=Path, default=GLM)
+    ap.add_argument("--out", type=Path, default=OUT)
+    ap.add_argument("--seconds", type=int, help="simulated span (default: the .glm clock)")
+    ap.add_argument("--interval", type=int, help="recording interval, s (default: the recorder's)")
+    ap.add_argument("--props", default="voltage_C",
+                    help="comma-separated meter properties; 'recorder' uses the .glm recorder's list")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--flat", action="store_true", help="loads fixed at their .glm values")
+    args = ap.parse_args()
+
+    props = None if args.props == "recorder" else args.props.split(",")
+    run(args.glm, args.out, args.seconds, args.interval, props, args.seed, args.flat)
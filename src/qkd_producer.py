@@ -1,18 +1,106 @@
 #!/usr/bin/env python3
+"""Simulated QKD key producer.
+
+Default cadence matches the original simulator (one key every 2 s).  Raise
+``--rate``/``--burst`` to stress-test consumers, e.g.
+
+    python src/qkd_producer.py --rate 5000 --burst 500 --high-water 20000
+"""
 import time
 import secrets
+import argparse
 from pathlib import Path
+from key_vault import KeyVault, VAULT_PATH, new_key_id
+from key_allocator import pending_keys
+from key_bus import KeyPublisher, BUS_PATH
 
 # ─── Configuration ──────────────────────────────────────────────────────────
 ROOT = Path(__file__).resolve().parents[1]
 KEY_DIR = ROOT / "keys"
 KEY_DIR.mkdir(exist_ok=True)
+REPORT_EVERY = 5.0          # seconds between keys/s reports
 # ─────────────────────────────────────────────────────────────────────────────
 
+ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+ap.add_argument("--files", action="store_true",
+                help="legacy mode: one keys/<id>.bin file per key instead of the vault")
+ap.add_argument("--rate", type=float, default=0.5, help="target keys per second")
+ap.add_argument("--burst", type=int, default=1, help="keys written per commit")
+ap.add_argument("--high-water", type=int, default=0,
+                help="pre-fill the pool of unconsumed keys to this size before pacing")
+ap.add_argument("--count", type=int, default=0, help="stop after this many keys (0 = run forever)")
+ap.add_argument("--no-fsync", action="store_true", help="skip fsync per commit (benchmarks only)")
+ap.add_argument("--publish", nargs="?", const=BUS_PATH, type=Path, metavar="SOCKET",
+                help=f"push keys to subscribers over a Unix socket (default {BUS_PATH})")
+args = ap.parse_args()
+if args.files and args.publish:
+    ap.error("--publish needs the vault, it cannot be combined with --files")
+
+vault = None if args.files else KeyVault(VAULT_PATH, create=True, fsync=not args.no_fsync)
+bus = KeyPublisher(VAULT_PATH, args.publish) if args.publish else None
+last_id = None
+
+
+def pool_size() -> int:
+    if vault is None:
+        return sum(1 for _ in KEY_DIR.glob("*.bin"))
+    return pending_keys(vault)
+
+
+def write_burst(n: int):
+    global last_id
+    keys = [secrets.token_bytes(32) for _ in range(n)]      # 256-bit keys
+    if vault is not None:
+        ids = vault.add(keys)
+    else:
+        ids = []
+        for key in keys:
+            last_id = new_key_id(last_id)
+            (KEY_DIR / f"{last_id}.bin").write_bytes(key)
+            ids.append(last_id)
+    if bus is not None:
+        bus.notify()
+    if n == 1 and args.rate <= 1:
+        print(f"  • wrote key {ids[0]} → {vault.path if vault else KEY_DIR}")
+    return n
+
+
 print("🔑  QKD‐simulator key producer starting… Ctrl-C to stop")
-while True:
-    key = secrets.token_bytes(32)           # 256-bit key
-    fname = f"{int(time.time())}.bin"
-    (KEY_DIR / fname).write_bytes(key)
-    print(f"  • wrote key → {KEY_DIR / fname}")
-    time.sleep(2)
+if bus is not None:
+    print(f"  • publishing keys on {bus.path}")
+
+produced = 0
+if args.high_water:
+    t0, have = time.perf_counter(), pool_size()
+    while have < args.high_water:
+        have += write_burst(min(args.burst, args.high_water - have))
+    dt = time.perf_counter() - t0
+    print(f"  • pool pre-filled to {have} keys in {dt:.2f}s")
+
+start = last_report = time.perf_counter()
+since_report = 0
+try:
+    while not args.count or produced < args.count:
+        n = args.burst if not args.count else min(args.burst, args.count - produced)
+        produced += write_burst(n)
+        since_report += n
+
+        now = time.perf_counter()
+        if now - last_report >= REPORT_EVERY:
+            print(f"  • {since_report / (now - last_report):,.0f} keys/s "
+                  f"(target {args.rate:g}, total {produced})")
+            last_report, since_report = now, 0
+
+        if args.count and produced >= args.count:
+            break
+        delay = start + produced / args.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+except KeyboardInterrupt:
+    pass
+finally:
+    if bus is not None:
+        bus.close()
+
+elapsed = time.perf_counter() - start
+print(f"✓ produced {produced} keys in {elapsed:.2f}s → {produced / max(elapsed, 1e-9):,.2f} keys/s")
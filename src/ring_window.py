@@ -0,0 +1,41 @@
+"""Preallocated sliding window over a stream of feature rows.
+
+``RingWindow.push(rows)`` copies new rows into a fixed float32 buffer that
+also holds the previous ``width - 1`` rows, and yields every window that the
+new rows complete as one strided ``(n, width, features)`` view — no per-row
+allocation, and a whole backlog can be scored in a few batched forward passes.
+A yielded view aliases the buffer, so consume it before the next iteration.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class RingWindow:
+    def __init__(self, width, n_features, capacity=4096):
+        self.width = width
+        self.buf   = np.zeros((width - 1 + capacity, n_features), dtype=np.float32)
+        self.fill  = 0                   # history rows at the front of buf (< width)
+
+    @property
+    def capacity(self):
+        return len(self.buf) - (self.width - 1)
+
+    def push(self, rows):
+        """Yield ``(first, windows)`` per chunk of *rows*: ``windows[j]`` ends at ``rows[first + j]``."""
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, self.buf.shape[1])
+        w = self.width
+        for start in range(0, len(rows), self.capacity):
+            chunk = rows[start:start + self.capacity]
+            total = self.fill + len(chunk)
+            self.buf[self.fill:total] = chunk
+            if total >= w:
+                # window j covers buf[j : j + w] and ends at chunk row j + w - 1 - fill
+                windows = sliding_window_view(self.buf[:total], w, axis=0,
+                                              writeable=True).swapaxes(1, 2)
+                yield start + w - 1 - self.fill, windows
+            keep = min(total, w - 1)
+            self.buf[:keep] = self.buf[total - keep:total]
+            self.fill = keep
+
+    def __len__(self):
+        return self.fill
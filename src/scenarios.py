@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Batch scenario runner: parameter grid → labelled datasets, over a process pool.
+
+A grid is a JSON object mapping each parameter to a list of values; every
+combination is one scenario:
+
+    {"seconds": [3600], "seed": [0, 1, 2], "load": [0.8, 1.0, 1.2],
+     "daily": [0.25], "noise": [0.02],
+     "fault": [null, {"bus": "l671", "phases": "C", "z": 2, "start": 600, "stop": 660}],
+     "mix": ["none", "all", ["sag", "spike", "fdi"]]}
+
+Each scenario runs the power-flow surrogate (powerflow.py), derives the
+feature columns, injects its anomaly mix (anomalies.py; ``"all"`` expects at
+least ``MIN_EVENTS`` of every kind) and writes, under
+``<out>/<scenario id>/``:
+
+    raw.csv          recorder-format output of the surrogate
+    <column>.npy     V_real, V_imag, P_node1, Q_node1, V_node1, time, label
+    intervals.npy    (start, stop, kind) ground truth, faults included
+    manifest.json    parameters, row count, label share, timings, file hashes
+
+The scenario id is a hash of its parameters and ``manifest.json`` is written
+last, so re-running the same grid skips every finished scenario and redoes
+any that were interrupted.  ``<out>/sweep.json`` lists the sweep's scenarios.
+
+Usage:  python src/scenarios.py [--grid GRID.json] [--out DIR] [--workers N] [--list]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import itertools
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT  = ROOT / "data" / "scenarios"
+
+# ─── Configuration ──────────────────────────────────────────────────────────
+DEFAULT_GRID = {
+    "seconds": [3600],
+    "seed":    [0, 1],
+    "load":    [0.8, 1.0, 1.2],
+    "daily":   [0.25],
+    "noise":   [0.02],
+    "fault":   [None,
+                {"bus": "l671", "phases": "C", "z": 2.0, "start": 600, "stop": 660},
+                {"bus": "l675", "phases": "A", "z": 5.0, "start": 1800, "stop": 1830}],
+    "mix":     ["none", "all"],
+}
+MIN_EVENTS = 1.0    # "all" raises each kind's rate to at least this many events per scenario
+WORKERS = os.cpu_count() or 1
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+def expand(grid):
+    """Every combination of the grid's values, as parameter dicts (sorted keys)."""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def scenario_id(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _sha(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def done(directory):
+    try:
+        return json.loads((Path(directory) / "manifest.json").read_text()).get("status") == "done"
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def run_scenario(params, out):
+    """Simulate, featurize and label one scenario into ``out/<id>``; returns its manifest."""
+    # imported here so the pool workers pay for them, not the parent's startup
+    import powerflow
+    from phasor import parse_complex
+    from anomalies import KINDS, inject, row_labels, INTERVAL
+
+    sid = scenario_id(params)
+    d = Path(out) / sid
+    shutil.rmtree(d, ignore_errors=True)               # leftovers of an interrupted run
+    d.mkdir(parents=True)
+    t0 = time.perf_counter()
+
+    fault = params.get("fault")
+    seed = params.get("seed", 0)
+    powerflow.run(out=d / "raw.csv", seconds=params.get("seconds"), props=["voltage_C"], seed=seed,
+                  load=params.get("load", 1.0), daily=params.get("daily", powerflow.DAILY),
+                  noise=params.get("noise", powerflow.NOISE), faults=[fault] if fault else (),
+                  quiet=True)
+    t_sim = time.perf_counter() - t0
+
+    raw = pd.read_csv(d / "raw.csv", comment="#", names=["timestamp", "voltage_C"], dtype=str)
+    vr, vi = parse_complex(raw["voltage_C"])
+    ts = pd.to_datetime(raw["timestamp"].str[:19], format="%Y-%m-%d %H:%M:%S")
+    cols = {"V_real": vr, "V_imag": vi, "P_node1": vr * 0.1, "Q_node1": vi * 0.1,
+            "V_node1": np.hypot(vr, vi), "time": (ts - ts.iloc[0]).dt.total_seconds().to_numpy(copy=True)}   # inject writes it
+
+    mix = params.get("mix", "none")
+    if mix == "all":                                   # at the default rates an hour holds ~1 event
+        spec = [{"kind": k, "rate": max(v["rate"], MIN_EVENTS / len(vr))} for k, v in KINDS.items()]
+    else:
+        spec = [] if mix == "none" else list(mix)
+    iv = inject(cols, spec, seed=seed)
+    if fault:                                          # fault spans are ground truth too
+        t = cols["time"]
+        rows = np.flatnonzero((t >= fault["start"]) & (t < fault["stop"]))
+        if len(rows):
+            extra = np.array([(rows[0], rows[-1] + 1, "fault")], INTERVAL)
+            iv = np.sort(np.concatenate([iv, extra]), order="start", kind="stable")
+    label = row_labels(len(vr), iv)
+
+    for name, x in {**cols, "label": label}.items():
+        np.save(d / f"{name}.npy", x)
+    np.save(d / "intervals.npy", iv)
+    files = sorted(p.name for p in d.iterdir())
+    manifest = {
+        "id": sid, "status": "done", "params": params, "rows": len(vr),
+        "events": len(iv), "label_share": float(label.mean()),
+        "seconds": {"simulate": round(t_sim, 3), "total": round(time.perf_counter() - t0, 3)},
+        "files": {name: _sha(d / name) for name in files},
+    }
+    tmp = d / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest, indent=1))
+    os.replace(tmp, d / "manifest.json")
+    return manifest
+
+
+def sweep(grid=DEFAULT_GRID, out=OUT, workers=WORKERS):
+    """Run every unfinished scenario of *grid*; returns the manifests produced this run."""
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    scenarios = expand(grid)
+    (out / "sweep.json").write_text(json.dumps(
+        {"grid": grid, "scenarios": [scenario_id(p) for p in scenarios]}, indent=1))
+    todo = [p for p in scenarios if not done(out / scenario_id(p))]
+    print(f"{len(scenarios)} scenarios, {len(scenarios) - len(todo)} already done, "
+          f"{len(todo)} to run on {workers} workers")
+
+    t0, manifests, failed = time.perf_counter(), [], 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_scenario, p, out): p for p in todo}
+        for fut in as_completed(futures):
+            try:
+                m = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"✗ {scenario_id(futures[fut])}: {e}", file=sys.stderr)
+                continue
+            manifests.append(m)
+            elapsed = time.perf_counter() - t0
+            print(f"✓ {m['id']}  {m['rows']:,} rows  {m['label_share']:.1%} labelled  "
+                  f"[{len(manifests)}/{len(todo)}, {len(manifests) / elapsed * 60:.1f} scenarios/min]")
+    if todo:
+        elapsed = time.perf_counter() - t0
+        print(f"done: {len(manifests)} scenarios in {elapsed:.1f} s "
+              f"({len(manifests) / elapsed * 60:.1f} scenarios/min), {failed} failed")
+    return manifests
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="scenario sweep runner")
+    ap.add_argument("--grid", type=Path, help="JSON grid (default: DEFAULT_GRID)")
+    ap.add_argument("--out", type=Path, default=OUT)
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--list", action="store_true", help="print the expanded scenarios and exit")
+    args = ap.parse_args()
+
+    grid = json.loads(args.grid.read_text()) if args.grid else DEFAULT_GRID
+    if args.list:
+        for p in expand(grid):
+            state = "done" if done(args.out / scenario_id(p)) else "todo"
+            print(scenario_id(p), state, json.dumps(p, sort_keys=True))
+    else:
+        sweep(grid, args.out, args.workers)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Incremental reconstruction-error scoring for the LSTM autoencoder.
+
+``AE.forward`` encodes a full SEQ-step window and decodes SEQ steps, so a
+sliding score costs O(SEQ) LSTM steps per sample.  Here the cost per sample
+is O(lanes + dec_steps), independent of SEQ:
+
+  * encoder — ``lanes`` copies of the encoder run over the stream, staggered
+    by ~SEQ/lanes steps and each reset every SEQ steps.  The window ending at
+    t uses the lane with the longest history, which covers the most recent
+    (SEQ - ceil(SEQ/lanes), SEQ] samples; lanes=SEQ is the exact encoder.
+  * decoder — the decoder sees the same input at every step, so only the
+    first ``dec_steps`` outputs are computed; later ones are taken to be the
+    last computed output and their squared error against the window comes
+    from running sums of x and |x|^2.  dec_steps=SEQ is the exact decoder.
+
+``score_series`` does this for a whole recording in a few batched calls;
+``StreamingScorer`` advances one sample at a time.  Neither has an error
+bound, only the benchmark below, so evaluation and the monitor use the full
+autoencoder and this is opt-in (``EXACT = False`` in eval.py, ``--fast``).
+
+Benchmark against the full-window path:  python src/streaming_ae.py
+"""
+import numpy as np
+import torch
+from windows import sliding_windows, iter_windows
+
+LANES     = 6
+DEC_STEPS = 8
+
+
+def _offsets(seq, lanes):
+    lanes = min(lanes, seq)
+    return [j * seq // lanes for j in range(lanes)]
+
+
+def _sigmoid(z):
+    return 0.5 * (np.tanh(0.5 * z) + 1.0)
+
+
+def _lstm_np(lstm):
+    """(W_ih^T, W_hh^T, bias) of a single-layer nn.LSTM, as float64 numpy arrays."""
+    w = {k: v.detach().double().numpy() for k, v in lstm.state_dict().items()}
+    return w["weight_ih_l0"].T.copy(), w["weight_hh_l0"].T.copy(), w["bias_ih_l0"] + w["bias_hh_l0"]
+
+
+def _cell_np(gates, c):
+    n = gates.shape[-1] // 4                          # gate order: i, f, g, o
+    s = _sigmoid(gates)
+    c = s[..., n:2 * n] * c + s[..., :n] * np.tanh(gates[..., 2 * n:3 * n])
+    return s[..., 3 * n:] * np.tanh(c), c
+
+
+def _err(dec, x_head, c, sx_tail, sq_tail, n_tail, width):
+    """Mean squared error: exact head + steady-state tail from running sums."""
+    head = ((dec.double() - x_head) ** 2).sum(dim=(1, 2))
+    c = c.double()
+    tail = n_tail * (c * c).sum(-1) - 2 * (c * sx_tail).sum(-1) + sq_tail
+    return (head + tail) / width
+
+
+@torch.no_grad()
+def score_series(net, x, seq, lanes=LANES, dec_steps=DEC_STEPS, chunk=None, out=None):
+    """Score every window ``x[i:i+seq]`` for i in range(len(x) - seq + 1).
+
+    Without *chunk* the series is scored in one pass.  With it, about that
+    many windows are scored per pass (rounded to a multiple of seq so lane
+    phases line up), bounding memory; the result is identical.  *out* may be a preallocated float32 array to fill."""
+    x = torch.as_tensor(x, dtype=torch.float32)
+    n_win = max(len(x) - seq + 1, 0)
+    if out is None:
+        out = np.empty(n_win, dtype=np.float32)
+    if not chunk:
+        out[:n_win] = _score_block(net, x, seq, lanes, dec_steps)
+        return out
+    step, filled = -(-chunk // seq) * seq, 0
+    for end in range(0, len(x), step):
+        lo = max(end - seq, 0)                            # seq rows of history, phase-aligned
+        errs = _score_block(net, x[lo:end + step], seq, lanes, dec_steps)[1 if end else 0:]
+        first = lo + (1 if end else 0)
+        k = min(len(errs), n_win - first)
+        if k <= 0:
+            break
+        out[first:first + k] = errs[:k]
+        filled = first + k
+    if filled != n_win:
+        raise RuntimeError(f"score_series filled {filled} of {n_win} windows")
+    return out
+
+
+def _score_block(net, x, seq, lanes, dec_steps):
+    n, d = x.shape
+    n_win = n - seq + 1
+    if n_win <= 0:
+        return np.empty(0, dtype=np.float32)
+    L = min(dec_steps, seq)
+
+    # encoder: every lane splits the stream into back-to-back seq-long segments
+    offs = torch.tensor(_offsets(seq, lanes))
+    pad = torch.cat([x, x.new_zeros(seq, d)])
+    segs, base = [], []
+    for o in offs.tolist():
+        base.append(sum(len(s) for s in segs))
+        segs.append(pad[o:].unfold(0, seq, seq).movedim(-1, 1)[:-(-(n - o) // seq)])
+    h_all, _ = net.enc(torch.cat(segs))                   # (segments, seq, hidden)
+
+    ends = torch.arange(seq - 1, n)
+    pos = (ends[:, None] - offs) % seq                    # history length - 1, per lane
+    pos[ends[:, None] < offs] = -1
+    lane = pos.argmax(1)
+    p = pos[torch.arange(n_win), lane]
+    seg = torch.tensor(base)[lane] + (ends - offs[lane]) // seq
+    h = h_all[seg, p]                                     # (n_win, hidden)
+
+    # decoder: first L steps exactly, the rest from prefix sums
+    dec, _ = net.dec(h[:, None].expand(-1, L, -1))
+    xd = x.double()
+    cs = torch.cat([xd.new_zeros(1, d), xd.cumsum(0)])
+    cq = torch.cat([xd.new_zeros(1), (xd * xd).sum(1).cumsum(0)])
+    i = torch.arange(n_win)
+    head = sliding_windows(xd, L, n_win)
+    err = _err(dec, head, dec[:, -1], cs[i + seq] - cs[i + L], cq[i + seq] - cq[i + L],
+               seq - L, seq * d)
+    return err.float().numpy()
+
+
+class StreamingScorer:
+    """Online counterpart of ``score_series``: ``step(row)`` returns the error of
+    the window ending at *row*, or None until ``seq`` rows have been seen.
+
+    Batch-of-one torch calls are dominated by dispatch overhead, so the few
+    small matrix products per sample are done in numpy."""
+
+    def __init__(self, net, seq, lanes=LANES, dec_steps=DEC_STEPS):
+        self.seq = seq
+        self.L   = min(dec_steps, seq)
+        offs     = _offsets(seq, lanes)
+        hidden, d = net.enc.hidden_size, net.enc.input_size
+        self.enc = _lstm_np(net.enc)
+        self.dec = _lstm_np(net.dec)
+        self.h = np.zeros((len(offs), hidden))
+        self.c = np.zeros((len(offs), hidden))
+        # per phase t % seq: lane to reset before the step, lane with the longest history after it
+        self.reset = {o: j for j, o in enumerate(offs)}
+        self.best  = [max(range(len(offs)), key=lambda j: (r - offs[j]) % seq) for r in range(seq)]
+        self.rows = np.zeros((seq, d))                # ring of the last seq rows
+        self.cs   = np.zeros((seq + 1, d))            # ring of prefix sums of x
+        self.cq   = np.zeros(seq + 1)                 # ring of prefix sums of |x|^2
+        self.t = 0
+
+    def _decode(self, h):
+        w_ih, w_hh, b = self.dec
+        gx = h @ w_ih + b                             # same input at every step
+        out = np.empty((self.L, w_hh.shape[0]))
+        hd = cd = np.zeros(w_hh.shape[0])
+        for k in range(self.L):
+            hd, cd = _cell_np(gx + hd @ w_hh, cd)
+            out[k] = hd
+        return out
+
+    def step(self, row):
+        row = np.asarray(row, dtype=np.float64)
+        t, seq, L, m = self.t, self.seq, self.L, self.seq + 1
+        j = self.reset.get(t % seq)
+        if j is not None:
+            self.h[j] = 0
+            self.c[j] = 0
+        w_ih, w_hh, b = self.enc
+        self.h, self.c = _cell_np(row @ w_ih + b + self.h @ w_hh, self.c)
+
+        self.rows[t % seq] = row
+        self.cs[(t + 1) % m] = self.cs[t % m] + row
+        self.cq[(t + 1) % m] = self.cq[t % m] + row @ row
+        self.t = t = t + 1
+        if t < seq:
+            return None
+
+        dec = self._decode(self.h[self.best[(t - 1) % seq]])
+        start = t - seq                                   # first row of the window
+        head = ((dec - self.rows[(start + np.arange(L)) % seq]) ** 2).sum()
+        c = dec[-1]
+        sx = self.cs[t % m] - self.cs[(start + L) % m]
+        sq = self.cq[t % m] - self.cq[(start + L) % m]
+        return float((head + (seq - L) * (c @ c) - 2 * (c @ sx) + sq) / (seq * len(row)))
+
+
+if __name__ == "__main__":
+    import time, argparse
+    from pathlib import Path
+    from model import COLS, SEQ, load_model
+    from feature_store import load_features, feature_matrix
+
+    ROOT = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(description="streaming vs full-window scoring benchmark")
+    ap.add_argument("--lanes", type=int, default=LANES)
+    ap.add_argument("--dec-steps", type=int, default=DEC_STEPS)
+    ap.add_argument("--seq", type=int, default=SEQ, help="window length to score with")
+    ap.add_argument("--online", type=int, default=300, help="samples for the per-sample comparison")
+    args = ap.parse_args()
+
+    net = load_model()
+    x = torch.from_numpy(feature_matrix(load_features(), COLS))
+    SEQ = args.seq
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        out = fn()
+        return out, time.perf_counter() - t0
+
+    @torch.no_grad()
+    def full_batch():
+        return np.concatenate([((net(w) - w) ** 2).mean(dim=(1, 2)).numpy()
+                               for _, w in iter_windows(x, SEQ)])
+
+    ref, t_full = timed(full_batch)
+    fast, t_fast = timed(lambda: score_series(net, x, SEQ, args.lanes, args.dec_steps))
+    rel = np.abs(fast - ref) / np.abs(ref)
+    thr = ref.mean() + 3 * ref.std()
+    agree = ((fast > thr) == (ref > thr)).mean()
+    print(f"windows={len(ref)}  SEQ={SEQ}  lanes={args.lanes}  dec_steps={args.dec_steps}")
+    print(f"batch   full-window {t_full * 1e3:8.1f} ms   streaming {t_fast * 1e3:8.1f} ms   "
+          f"×{t_full / t_fast:.1f}")
+    print(f"        max rel. error {rel.max():.2e}   threshold decisions agree {agree:.2%}")
+
+    n = min(args.online, len(x) - SEQ)
+    def full_online():
+        with torch.no_grad():
+            return [((net(w) - w) ** 2).mean().item()
+                    for w in sliding_windows(x, SEQ, n)[:, None]]
+    scorer = StreamingScorer(net, SEQ, args.lanes, args.dec_steps)
+    for r in x[:SEQ - 1].numpy():
+        scorer.step(r)
+    _, t_fo = timed(full_online)
+    _, t_so = timed(lambda: [scorer.step(r) for r in x[SEQ - 1:SEQ - 1 + n].numpy()])
+    print(f"online  full-window {t_fo / n * 1e6:8.0f} µs/sample   "
+          f"streaming {t_so / n * 1e6:8.0f} µs/sample   ×{t_fo / t_so:.1f}")
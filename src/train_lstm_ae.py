@@ -1,38 +1,211 @@
+"""GridLAB-D recorder CSV → annotated.csv, in bounded memory.
+
+The recorder file is read ``--chunk-rows`` rows at a time; each chunk is
+parsed, gets its anomalies injected and labelled, and is appended to the
+output before the next one is read.  Random draws come from a stream keyed by
+(seed, block of RNG_BLOCK rows), so row *i* gets the same draw whatever the
+chunk size, and time-based anomalies use the global ``time`` column — the
+output does not depend on how the input was chunked.
+
+With ``--partition-rows N`` the output is split into ``part-NNNNN.csv`` files
+of N rows each; a part appears (atomically) once it is complete.
+
+Usage:  python src/train_lstm_ae.py [--raw CSV] [--out CSV] [--chunk-rows N]
+                                    [--partition-rows N] [--seed S]
+"""
+import os
+import sys
+import time
+import argparse
 from pathlib import Path
 import pandas as pd, numpy as np
+from phasor import parse_complex
+from feature_store import load_features
 
 ROOT = Path(__file__).resolve().parents[1]
 RAW  = ROOT / "data" / "raw_normal.csv"
 OUT  = ROOT / "data" / "annotated.csv"
 
-# ---------- read GridLAB‑D output ------------------------------------------
-raw = pd.read_csv(RAW, comment="#", names=["timestamp", "voltage_C"])
-
-raw["timestamp"] = (
-    pd.to_datetime(raw["timestamp"].str.replace(" EST", ""), errors="coerce")
-      .dt.tz_localize("US/Eastern")
-)
-raw["time"] = (raw["timestamp"] - raw["timestamp"].min()).dt.total_seconds()
-
-raw["voltage_C"] = raw["voltage_C"].apply(
-    lambda x: complex(x) if isinstance(x, str) and "+" in x else np.nan
-)
-raw["P_node1"] = raw["voltage_C"].apply(lambda z: z.real * 0.1 if pd.notnull(z) else np.nan)
-raw["Q_node1"] = raw["voltage_C"].apply(lambda z: z.imag * 0.1 if pd.notnull(z) else np.nan)
-raw["V_node1"] = raw["voltage_C"].apply(lambda z: abs(z)       if pd.notnull(z) else np.nan)
-
-# ---------- inject artificial anomalies ------------------------------------
-np.random.seed(42)
-rows = np.random.choice(raw.index, size=int(0.02 * len(raw)), replace=False)
-raw.loc[rows, "P_node1"] *= np.random.uniform(1.2, 1.5, len(rows))
-# fast-feedback: 3-second packet-loss windows at 30 s, 60 s, 90 s
-for t in (30, 60, 90):
-    mask = (raw["time"] >= t) & (raw["time"] < t + 3)
-    raw.loc[mask, ["P_node1", "Q_node1", "V_node1"]] = np.nan
-
-
-raw["label"] = raw[["P_node1", "Q_node1", "V_node1"]].isna().any(axis=1) | raw.index.isin(rows)
-
-cols = ["timestamp", "voltage_C", "P_node1", "Q_node1", "V_node1", "time", "label"]
-raw[cols].to_csv(OUT, index=False)
-print("✓ anomalies injected → data/annotated.csv")
+# ─── Configuration ──────────────────────────────────────────────────────────
+CHUNK_ROWS   = 1_000_000
+SEED         = 42
+ANOMALY_RATE = 0.02          # share of rows with P_node1 scaled up
+SCALE        = (1.2, 1.5)
+LOSS_AT      = (30, 60, 90)  # fast-feedback: packet-loss windows start here (s)
+LOSS_LEN     = 3             # … and last this long (s)
+RNG_BLOCK    = 1 << 16       # rows per independently seeded block of draws
+REPORT_EVERY = 5.0           # seconds between progress lines
+COLS = ["timestamp", "voltage_C", "P_node1", "Q_node1", "V_node1", "time", "label"]
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+class RowRandoms:
+    """Uniform draws (2 per row) addressed by global row number."""
+
+    def __init__(self, seed=SEED):
+        self.seed  = seed
+        self._last = (None, None)
+
+    def _block(self, b):
+        if self._last[0] != b:
+            self._last = (b, np.random.default_rng([self.seed, b]).random((2, RNG_BLOCK)))
+        return self._last[1]
+
+    def __call__(self, start, stop):
+        first, last = start // RNG_BLOCK, (stop - 1) // RNG_BLOCK
+        draws = np.concatenate([self._block(b) for b in range(first, last + 1)], axis=1)
+        off = start - first * RNG_BLOCK
+        return draws[:, off:off + stop - start]
+
+
+def stamps(ts):
+    """Recorder timestamps as ``YYYY-MM-DD HH:MM:SS±HH:MM`` in US/Eastern (what
+    ``to_csv`` writes for tz-aware values, ~20x faster); empty where unparseable."""
+    local = ts.dt.tz_localize("US/Eastern", ambiguous="NaT", nonexistent="NaT")
+    offset = (local.dt.tz_localize(None) - local.dt.tz_convert("UTC").dt.tz_localize(None))
+    hours = (offset.dt.total_seconds() // 3600).fillna(0).astype(int).to_numpy()
+    text = np.char.add(np.char.replace(np.datetime_as_string(ts.to_numpy(), unit="s"), "T", " "),
+                       np.char.mod("%+03d:00", hours))
+    return np.where(local.isna().to_numpy(), "", text).astype(object)
+
+
+def annotate(chunk, start, t0, randoms):
+    """Derive features, inject anomalies and label rows ``start…`` of the recording."""
+    ts = pd.to_datetime(chunk["timestamp"].str[:19], errors="coerce",     # drop " EST"/" EDT"
+                        format="%Y-%m-%d %H:%M:%S")
+    out = pd.DataFrame(index=chunk.index)
+    out["timestamp"] = stamps(ts)
+    out["time"] = (ts - t0).dt.total_seconds()
+
+    vr, vi = parse_complex(chunk["voltage_C"])      # vectorized; NaN where unparseable
+    out["voltage_C"] = pd.Series(vr + 1j * vi, index=chunk.index).where(~np.isnan(vr))
+    out["P_node1"] = vr * 0.1
+    out["Q_node1"] = vi * 0.1
+    out["V_node1"] = np.hypot(vr, vi)
+
+    # ---------- inject artificial anomalies --------------------------------
+    u, f = randoms(start, start + len(chunk))
+    scaled = u < ANOMALY_RATE
+    lo, hi = SCALE
+    out.loc[scaled, "P_node1"] *= lo + (hi - lo) * f[scaled]
+    t = out["time"].to_numpy()
+    lost = np.zeros(len(chunk), bool)
+    for s in LOSS_AT:
+        lost |= (t >= s) & (t < s + LOSS_LEN)
+    out.loc[lost, ["P_node1", "Q_node1", "V_node1"]] = np.nan
+
+    out["label"] = out[["P_node1", "Q_node1", "V_node1"]].isna().any(axis=1).to_numpy() | scaled
+    return out[COLS]
+
+
+class CsvSink:
+    """Single output file, written to a temp name and renamed when complete."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp  = self.path.with_suffix(self.path.suffix + ".tmp")
+        self.f    = open(self.tmp, "w", newline="")
+        self.header = True
+
+    def write(self, df, start):
+        df.to_csv(self.f, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.f.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        """Drop the partial output; an existing file at ``path`` is left alone."""
+        self.f.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+class PartitionSink:
+    """``part-NNNNN.csv`` files of ``rows`` rows each, by global row number."""
+
+    def __init__(self, directory, rows):
+        self.dir  = Path(directory)
+        self.rows = rows
+        self.part = None
+        self.f    = None
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, part):
+        return self.dir / f"part-{part:05d}.csv"
+
+    def _finish(self):
+        if self.f is not None:
+            self.f.close()
+            os.replace(self._path(self.part).with_suffix(".tmp"), self._path(self.part))
+            self.f = None
+
+    def write(self, df, start):
+        while len(df):
+            part = start // self.rows
+            if part != self.part:
+                self._finish()
+                self.part = part
+                self.f = open(self._path(part).with_suffix(".tmp"), "w", newline="")
+                header = True
+            else:
+                header = False
+            take = (part + 1) * self.rows - start
+            df.iloc[:take].to_csv(self.f, index=False, header=header)
+            df, start = df.iloc[take:], start + min(take, len(df))
+
+    def close(self):
+        self._finish()
+
+    def abort(self):
+        """Drop the unfinished partition; completed ones stay."""
+        if self.f is not None:
+            self.f.close()
+            self._path(self.part).with_suffix(".tmp").unlink(missing_ok=True)
+            self.f = None
+
+
+def run(raw=RAW, out=OUT, chunk_rows=CHUNK_ROWS, partition_rows=0, seed=SEED):
+    sink = PartitionSink(out, partition_rows) if partition_rows else CsvSink(out)
+    randoms, t0, start = RowRandoms(seed), None, 0
+    began = last = time.perf_counter()
+    reader = pd.read_csv(raw, comment="#", names=["timestamp", "voltage_C"],
+                         dtype=str, chunksize=chunk_rows)
+    try:
+        for chunk in reader:
+            chunk = chunk.reset_index(drop=True)
+            if t0 is None:                          # the recorder writes rows in time order
+                t0 = pd.to_datetime(chunk["timestamp"].str[:19], errors="coerce",
+                                    format="%Y-%m-%d %H:%M:%S").min()
+            sink.write(annotate(chunk, start, t0, randoms), start)
+            start += len(chunk)
+            now = time.perf_counter()
+            if now - last >= REPORT_EVERY:
+                print(f"… {start:,} rows, {start / (now - began):,.0f} rows/s", file=sys.stderr)
+                last = now
+    except BaseException:                           # incl. Ctrl-C: never publish a truncated file
+        sink.abort()
+        raise
+    sink.close()
+    elapsed = time.perf_counter() - began
+    print(f"✓ {start:,} rows in {elapsed:.1f} s ({start / elapsed:,.0f} rows/s)")
+    return start
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--raw", type=Path, default=RAW)
+    ap.add_argument("--out", type=Path, default=None,
+                    help="output CSV, or directory with --partition-rows (default data/annotated.csv)")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--partition-rows", type=int, default=0,
+                    help="split the output into part files of this many rows")
+    ap.add_argument("--seed", type=int, default=SEED)
+    args = ap.parse_args()
+
+    out = args.out or (OUT.with_suffix("") if args.partition_rows else OUT)
+    run(args.raw, out, args.chunk_rows, args.partition_rows, args.seed)
+    print(f"✓ anomalies injected → {out}")
+    if not args.partition_rows:
+        load_features(out)      # prime data/features/ so consumers skip the CSV parse
+        print("✓ features cached → data/features/")
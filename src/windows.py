@@ -0,0 +1,26 @@
+"""Sliding windows over a (N, features) series without copying it.
+
+``sliding_windows`` returns an ``unfold`` view: window i is ``x[i:i+seq]`` and
+shares storage with *x*, so building every window costs no memory.  Models
+that need contiguous input take them through ``iter_windows``, which only
+materializes ``chunk`` windows at a time.
+"""
+import torch
+
+
+def sliding_windows(x, seq, count=None):
+    """View of shape ``(count, seq, features)``; *count* defaults to every full window."""
+    x = torch.as_tensor(x)
+    n = len(x) - seq + 1
+    if count is None or count > n:
+        count = max(n, 0)
+    if count <= 0:
+        return x.new_empty((0, seq) + tuple(x.shape[1:]))
+    return x.unfold(0, seq, 1).movedim(-1, 1)[:count]
+
+
+def iter_windows(x, seq, chunk=4096, count=None):
+    """Yield ``(start, windows)`` with at most *chunk* contiguous windows each."""
+    view = sliding_windows(x, seq, count)
+    for start in range(0, len(view), chunk):
+        yield start, view[start:start + chunk].contiguous()